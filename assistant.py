@@ -1,26 +1,87 @@
 import os
+import re
+import copy
 import sys
-import json
+import time
 import asyncio
-import traceback
+import logging
+import functools
 import platform
 import argparse
 from pathlib import Path
-from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict, Any
-from google import genai
+from datetime import date, datetime, timezone, timedelta
+from typing import Optional, List, Dict, Any, Callable, Set, TYPE_CHECKING
+if TYPE_CHECKING:
+    from google import genai # Imported in main_assistant_entry; pulling in the SDK would slow signup/startup
+try:
+    import orjson # Optional: C-accelerated JSON decoding for large Composio payloads
+except ImportError:
+    import json as orjson # Same loads()/JSONDecodeError interface
+try:
+    import uvloop # Optional: libuv-based event loop for the MCP/Gemini network I/O
+except ImportError:
+    uvloop = None
 
 # Import our modules
+# llm_processor, notifier and chat are imported where they're used: signup and off-schedule launchd runs
+# never need them, and chat exits at import time if the integrated MCP server isn't configured.
 import config_manager
-from mcp_handler import McpSessionManager
-import llm_processor
-import notifier
+from mcp_handler import McpSessionManager, McpSessionPool, loads_tool_text, MCP_CALL_TIMEOUT_S
 import user_interface
 import calendar_utils
-import chat
+
+# Colour codes bound once, so the many status prints don't repeat the module/class attribute lookups
+_RED, _GREEN, _YELLOW = user_interface.Fore.RED, user_interface.Fore.GREEN, user_interface.Fore.YELLOW
+_CYAN, _MAGENTA, _BLUE = user_interface.Fore.CYAN, user_interface.Fore.MAGENTA, user_interface.Fore.BLUE
+_DIM, _BRIGHT, _RESET = user_interface.Style.DIM, user_interface.Style.BRIGHT, user_interface.Style.RESET_ALL
 
 MODEL_NAME = "gemini-2.5-flash-preview-05-20"
 
+@functools.cache
+def get_gemini_client() -> "genai.Client":
+    """The process-wide Gemini client, created (and the SDK imported) on first use."""
+    from google import genai
+    return genai.Client(api_key=config_manager.DEV_CONFIG.get(config_manager.ENV_GOOGLE_API_KEY))
+
+# Diagnostics go through logging so they cost nothing unless DEBUG is enabled; user-facing output stays on print
+log = logging.getLogger("assistant")
+
+# One page normally covers a full day of unread mail; Gmail allows up to 500 per page
+GMAIL_PAGE_SIZE = config_manager.get_dev_config_int(config_manager.ENV_GMAIL_PAGE_SIZE, 100)
+GMAIL_MAX_PAGES = 2 # Safety cap for unusually busy inboxes
+# Full-payload pages are slow to build (Composio fetches each message), so a 100-message page can take longer
+# than the default per-call bound. Allow about half a second per requested message, never less than that bound
+GMAIL_PAGE_TIMEOUT_S = max(MCP_CALL_TIMEOUT_S, 0.5 * GMAIL_PAGE_SIZE)
+EMAIL_TRIAGE_BATCH_SIZE = 20 # Emails per Gemini triage request; batches run concurrently
+GEMINI_MAX_CONCURRENT_REQUESTS = 4 # Keeps the fan-out under Gemini's rate limits
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+# Reply actions mentioning any of these offer to look up free calendar slots. Plain substrings on purpose:
+# "time" also covers "times"/"suggest time" and "slot" covers "slots", as the old keyword checks did.
+_SLOT_TRIGGER_RE = re.compile(r"availability|time|slot|propose|free", re.IGNORECASE)
+# Actions offered for every email when the "all" preference skips LLM triage (read-only, so one tuple is shared)
+_DEFAULT_EMAIL_ACTIONS = ("View full email", "Mark as read", "Delete")
+# Keywords that route an LLM-suggested action to its handler, checked in this order in main_assistant_entry
+EMAIL_REPLY_KEYWORDS = ("draft", "reply", "availability", "times", "slots", "propose", "suggest")
+EMAIL_CREATE_EVENT_KEYWORDS = ("create calendar event", "schedule a meeting", "add to calendar")
+CALENDAR_UPDATE_KEYWORDS = ("update", "reschedule", "change title", "add attendee", "add google meet")
+CALENDAR_DELETE_KEYWORDS = ("delete", "cancel this meeting")
+CALENDAR_CREATE_KEYWORDS = ("create a new event", "schedule a follow-up", "schedule a prep session", "block additional time")
+
+def _keyword_re(keywords: tuple[str, ...]) -> re.Pattern:
+    """Compiles keywords into one case-insensitive alternation, so an action is scanned once per category."""
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
+_EMAIL_REPLY_RE = _keyword_re(EMAIL_REPLY_KEYWORDS)
+_EMAIL_CREATE_EVENT_RE = _keyword_re(EMAIL_CREATE_EVENT_KEYWORDS)
+_CALENDAR_UPDATE_RE = _keyword_re(CALENDAR_UPDATE_KEYWORDS)
+_CALENDAR_DELETE_RE = _keyword_re(CALENDAR_DELETE_KEYWORDS)
+_CALENDAR_CREATE_RE = _keyword_re(CALENDAR_CREATE_KEYWORDS)
+# Meeting durations typed by the user: "30m", "1h", "1h30m", "1h 30m"
+_DURATION_RE = re.compile(r"^\s*(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?\s*$", re.IGNORECASE)
+# Dates typed at the find-free-slots prompt, as accepted by strptime("%Y-%m-%d")
+_SLOT_DATE_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+
 # --- Helper for User Input & Signup Flow (from user_interface.py now) ---
 # These are called from user_interface.py, so no need to redefine here.
 
@@ -45,14 +106,14 @@ def generate_launchd_plist_content(
     print(f"DEBUG_PLIST_GEN: Result of venv_python_path.exists(): {path_exists_check}") # DEBUG
 
     if path_exists_check: # Use the stored result
-        print(f"{user_interface.Fore.GREEN}DEBUG_PLIST_GEN: venv_python_path EXISTS branch taken.{user_interface.Style.RESET_ALL}")
+        print(f"{_GREEN}DEBUG_PLIST_GEN: venv_python_path EXISTS branch taken.{_RESET}")
         python_exec_to_use_candidate = str(venv_python_path)
         print(f"DEBUG_PLIST_GEN: Candidate from venv: {python_exec_to_use_candidate}")
         python_exec_to_use = python_exec_to_use_candidate # Direct assignment
     else:
-        print(f"{user_interface.Fore.RED}DEBUG_PLIST_GEN: venv_python_path DOES NOT EXIST branch taken.{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}DEBUG_PLIST_GEN: venv_python_path DOES NOT EXIST branch taken.{_RESET}")
         current_sys_executable = str(Path(sys.executable).resolve())
-        print(f"{user_interface.Fore.YELLOW}WARNING: Virtual environment Python not found. Falling back to sys.executable: {current_sys_executable}{user_interface.Style.RESET_ALL}")
+        print(f"{_YELLOW}WARNING: Virtual environment Python not found. Falling back to sys.executable: {current_sys_executable}{_RESET}")
         python_exec_to_use = current_sys_executable
 
     print(f"DEBUG_PLIST_GEN: VALUE OF 'python_exec_to_use' AFTER IF/ELSE: {python_exec_to_use}") # Renamed for clarity
@@ -95,19 +156,42 @@ def generate_launchd_plist_content(
 """
     return plist_content
 
-def run_signup_flow(): # Stays in assistant.py as it uses config_manager directly
-    print(f"{user_interface.Fore.CYAN}Welcome to your Proactive AI Assistant!{user_interface.Style.RESET_ALL}")
-    print("Let's get you set up.")
-    user_interface.print_header("Initial Setup") # Using new UI helper
+def _signup_answers_from_env() -> Optional[Dict[str, Any]]:
+    """
+    Builds a complete signup config from SIGNUP_EMAIL/SIGNUP_PERSONA/SIGNUP_PRIORITIES for headless first runs.
+    Everything else takes the same defaults the interactive prompts offer. Returns None if not fully provided.
+    """
+    email = config_manager.DEV_CONFIG.get(config_manager.ENV_SIGNUP_EMAIL)
+    persona = config_manager.DEV_CONFIG.get(config_manager.ENV_SIGNUP_PERSONA)
+    priorities = config_manager.DEV_CONFIG.get(config_manager.ENV_SIGNUP_PRIORITIES)
+    if not (email and persona and priorities):
+        return None
+    if not _EMAIL_RE.match(email):
+        print(f"{_RED}{config_manager.ENV_SIGNUP_EMAIL} '{email}' is not a valid email address. Falling back to interactive setup.{_RESET}")
+        return None
+    return {
+        config_manager.USER_EMAIL_KEY: email,
+        config_manager.USER_PERSONA_KEY: persona,
+        config_manager.USER_PRIORITIES_KEY: priorities,
+        config_manager.NOTIFICATION_PREFS_KEY: {"email": "important", "calendar": "on"},
+        config_manager.SCHED_FREQUENCY_MINUTES_KEY: 30,
+        config_manager.SCHED_ACTIVE_DAYS_KEY: [0, 1, 2, 3, 4],
+        config_manager.SCHED_ACTIVE_START_HOUR_KEY: 9,
+        config_manager.SCHED_ACTIVE_END_HOUR_KEY: 18,
+        config_manager.WORK_START_HOUR_KEY: 9,
+        config_manager.WORK_END_HOUR_KEY: 18,
+    }
 
+def _collect_signup_answers() -> Dict[str, Any]:
+    """Asks the interactive signup questions (identity, notifications, schedule)."""
     user_config = {}
     while True:
         email = user_interface.get_user_input("Please enter your primary email address (this will be your user ID for service connections)")
-        if email and "@" in email and "." in email.split("@")[-1]:
+        if _EMAIL_RE.match(email):
             user_config[config_manager.USER_EMAIL_KEY] = email
             break
         else:
-            print(f"{user_interface.Fore.RED}Invalid email format. Please try again.{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}Invalid email format. Please try again.{_RESET}")
 
     user_config[config_manager.USER_PERSONA_KEY] = user_interface.get_user_input("Describe your role and main work focus")
     user_config[config_manager.USER_PRIORITIES_KEY] = user_interface.get_user_input("What are your key work priorities?")
@@ -134,9 +218,9 @@ def run_signup_flow(): # Stays in assistant.py as it uses config_manager directl
             if user_config[config_manager.SCHED_FREQUENCY_MINUTES_KEY] > 0:
                 break
             else:
-                print(f"{user_interface.Fore.RED}Frequency must be positive.{user_interface.Style.RESET_ALL}")
+                print(f"{_RED}Frequency must be positive.{_RESET}")
         except ValueError:
-            print(f"{user_interface.Fore.RED}Invalid frequency format. Use numbers optionally followed by 'm' or 'h'.{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}Invalid frequency format. Use numbers optionally followed by 'm' or 'h'.{_RESET}")
 
     days_map = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
     active_days_input_str = user_interface.get_user_input(
@@ -163,9 +247,9 @@ def run_signup_flow(): # Stays in assistant.py as it uses config_manager directl
                 user_config[config_manager.WORK_START_HOUR_KEY] = start_h # Default working hour start to schedule start
                 break
             else:
-                print(f"{user_interface.Fore.RED}Hour must be 0-23.{user_interface.Style.RESET_ALL}")
+                print(f"{_RED}Hour must be 0-23.{_RESET}")
         except ValueError:
-            print(f"{user_interface.Fore.RED}Invalid hour.{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}Invalid hour.{_RESET}")
 
     while True:
         try:
@@ -176,9 +260,9 @@ def run_signup_flow(): # Stays in assistant.py as it uses config_manager directl
                 user_config[config_manager.WORK_END_HOUR_KEY] = end_h # Default working hour end to schedule end
                 break
             else:
-                print(f"{user_interface.Fore.RED}End hour must be after start hour and <= 23.{user_interface.Style.RESET_ALL}")
+                print(f"{_RED}End hour must be after start hour and <= 23.{_RESET}")
         except ValueError:
-            print(f"{user_interface.Fore.RED}Invalid hour.{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}Invalid hour.{_RESET}")
 
     # Optionally, ask specifically for working hours if they differ from active check hours
     if user_interface.get_yes_no_input("Are your typical working hours for free-slot calculation different from these active check hours?", default_yes=False):
@@ -189,7 +273,7 @@ def run_signup_flow(): # Stays in assistant.py as it uses config_manager directl
                 if 0 <= work_start_h <= 23:
                     user_config[config_manager.WORK_START_HOUR_KEY] = work_start_h
                     break
-            except ValueError: print(f"{user_interface.Fore.RED}Invalid hour.{user_interface.Style.RESET_ALL}")
+            except ValueError: print(f"{_RED}Invalid hour.{_RESET}")
         while True: # Working End Hour
             try:
                 work_end_h_str = user_interface.get_user_input(f"Your typical workday END hour (0-23, after {user_config[config_manager.WORK_START_HOUR_KEY]})?", default=str(user_config[config_manager.SCHED_ACTIVE_END_HOUR_KEY]))
@@ -197,28 +281,41 @@ def run_signup_flow(): # Stays in assistant.py as it uses config_manager directl
                 if user_config[config_manager.WORK_START_HOUR_KEY] < work_end_h <= 23:
                     user_config[config_manager.WORK_END_HOUR_KEY] = work_end_h
                     break
-            except ValueError: print(f"{user_interface.Fore.RED}Invalid hour.{user_interface.Style.RESET_ALL}")
+            except ValueError: print(f"{_RED}Invalid hour.{_RESET}")
     # --- END OF SCHEDULING AND WORKING HOURS PROMPTS ---
+    return user_config
+
+
+def run_signup_flow(env_answers: Optional[Dict[str, Any]] = None): # Stays in assistant.py as it uses config_manager directly
+    """Runs first-time setup, using env_answers (from _signup_answers_from_env) instead of the prompts if given."""
+    print(f"{_CYAN}Welcome to your Proactive AI Assistant!{_RESET}")
+    print("Let's get you set up.")
+    user_interface.print_header("Initial Setup") # Using new UI helper
 
+    user_config = env_answers
+    if user_config:
+        print(f"{_DIM}Using signup answers from environment ({config_manager.ENV_SIGNUP_EMAIL}, ...). Defaults applied for everything else.{_RESET}")
+    else:
+        user_config = _collect_signup_answers()
 
     gmail_server_uuid = config_manager.DEV_CONFIG.get(config_manager.ENV_GMAIL_MCP_SERVER_UUID)
     calendar_server_uuid = config_manager.DEV_CONFIG.get(config_manager.ENV_CALENDAR_MCP_SERVER_UUID)
 
     if not gmail_server_uuid or not calendar_server_uuid:
-        print(f"\n{user_interface.Fore.RED}Error: GMAIL_MCP_SERVER_UUID or CALENDAR_MCP_SERVER_UUID not found in .env file.{user_interface.Style.RESET_ALL}")
+        print(f"\n{_RED}Error: GMAIL_MCP_SERVER_UUID or CALENDAR_MCP_SERVER_UUID not found in .env file.{_RESET}")
         sys.exit("Critical configuration missing: MCP Server UUIDs.")
 
     user_config[config_manager.GMAIL_MCP_URL_KEY] = f"https://mcp.composio.dev/composio/server/{gmail_server_uuid}?transport=sse&include_composio_helper_actions=true"
     user_config[config_manager.CALENDAR_MCP_URL_KEY] = f"https://mcp.composio.dev/composio/server/{calendar_server_uuid}?transport=sse&include_composio_helper_actions=true"
 
-    print(f"\nUsing Gmail MCP Server UUID: {user_interface.Fore.YELLOW}{gmail_server_uuid}{user_interface.Style.RESET_ALL}")
-    print(f"Using Calendar MCP Server UUID: {user_interface.Fore.YELLOW}{calendar_server_uuid}{user_interface.Style.RESET_ALL}")
+    print(f"\nUsing Gmail MCP Server UUID: {_YELLOW}{gmail_server_uuid}{_RESET}")
+    print(f"Using Calendar MCP Server UUID: {_YELLOW}{calendar_server_uuid}{_RESET}")
 
     user_config[config_manager.LAST_EMAIL_CHECK_KEY] = datetime.now(timezone.utc).isoformat()
 
     if config_manager.save_user_config(user_config):
         user_interface.print_header("Setup Complete & launchd Agent Configuration")
-        print(f"{user_interface.Fore.GREEN}Your preferences have been saved.{user_interface.Style.RESET_ALL}")
+        print(f"{_GREEN}Your preferences have been saved.{_RESET}")
 
         # +++++++++++++ SART OF NEW .PLIST GENERATION LOGIC +++++++++++++
         if platform.system() == "Darwin":
@@ -251,287 +348,609 @@ def run_signup_flow(): # Stays in assistant.py as it uses config_manager directl
                     f.write(plist_content_str)
 
 
-                print(f"\n{user_interface.Fore.GREEN}A launchd agent file has been created at:{user_interface.Style.RESET_ALL}")
+                print(f"\n{_GREEN}A launchd agent file has been created at:{_RESET}")
                 print(f"  {plist_file_path}")
-                print(f"\n{user_interface.Fore.YELLOW}To enable automatic background checks, open Terminal and run:{user_interface.Style.RESET_ALL}")
+                print(f"\n{_YELLOW}To enable automatic background checks, open Terminal and run:{_RESET}")
                 print(f"  launchctl load {plist_file_path}")
-                print(f"\n{user_interface.Fore.CYAN}The assistant will then run every {user_config[config_manager.SCHED_FREQUENCY_MINUTES_KEY]} minutes during your active hours/days.{user_interface.Style.RESET_ALL}")
+                print(f"\n{_CYAN}The assistant will then run every {user_config[config_manager.SCHED_FREQUENCY_MINUTES_KEY]} minutes during your active hours/days.{_RESET}")
                 print(f"Logs will be written to: {log_storage_dir}/assistant_out.log and assistant_err.log")
                 print(f"To stop automatic checks, run:")
                 print(f"  launchctl unload {plist_file_path}")
 
             except Exception as e:
-                print(f"\n{user_interface.Fore.RED}Error creating launchd agent file: {e}{user_interface.Style.RESET_ALL}")
-                print(f"{user_interface.Fore.YELLOW}You will need to set up scheduling manually if desired.{user_interface.Style.RESET_ALL}")
+                print(f"\n{_RED}Error creating launchd agent file: {e}{_RESET}")
+                print(f"{_YELLOW}You will need to set up scheduling manually if desired.{_RESET}")
     else:
-        print(f"{user_interface.Fore.RED}Error: Could not save your configuration.{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}Error: Could not save your configuration.{_RESET}")
         sys.exit("Failed to save user configuration.")
     return user_config
 
 
 async def redirect_to_chat():
     """Start integrated chat session"""
-    print(f"{user_interface.Fore.CYAN}Starting chat with assistant...{user_interface.Style.RESET_ALL}")
+    print(f"{_CYAN}Starting chat with assistant...{_RESET}")
+
+    try:
+        import chat
+    except SystemExit: # chat.py exits when INTEGRATED_MCP_SERVER_UUID is missing
+        print(f"{_RED}Chat is unavailable: the integrated MCP server is not configured.{_RESET}")
+        return
 
     try:
         # Run chat session in the current process - use await instead of asyncio.run()
         await chat.start_chat_session()
     except KeyboardInterrupt:
-        print(f"{user_interface.Fore.YELLOW}Chat session ended.{user_interface.Style.RESET_ALL}")
+        print(f"{_YELLOW}Chat session ended.{_RESET}")
 
     # Return to main menu instead of exiting
-    print(f"{user_interface.Fore.GREEN}Returning to main menu...{user_interface.Style.RESET_ALL}")
+    print(f"{_GREEN}Returning to main menu...{_RESET}")
 
 
-# --- Main Application Logic (Async now) ---
-async def perform_proactive_checks(user_config: Dict[str, Any], gemini_client: genai.Client, model_name: str) -> tuple[bool, List[Dict[str, Any]], List[Dict[str, Any]]]:
+# --- MCP Session Reuse ---
+# One live session per MCP server/user/app for the whole run, shared by the proactive checks and the action handlers
+_MCP_SESSIONS = McpSessionPool()
+
+# Composio app names. A session's app_name is matched against Composio's connection errors and passed to
+# COMPOSIO_INITIATE_CONNECTION when re-auth is needed, so it must be the real service name
+GMAIL_APP_NAME = "gmail"
+CALENDAR_APP_NAME = "googlecalendar"
+
+async def get_session(mcp_base_url: str, user_id: str, app_name: str) -> McpSessionManager:
+    """Returns a live McpSessionManager for this server/user/app, connecting on first use."""
+    return await _MCP_SESSIONS.get(mcp_base_url, user_id, app_name)
+
+# Running warm-up tasks. The event loop only keeps weak references, so an unreferenced task could be collected mid-connect
+_warmup_tasks: Set[asyncio.Task] = set()
+
+def prewarm_session(mcp_base_url: str, user_id: str, app_name: str):
     """
-    Performs one cycle of proactive checks for Gmail and Calendar.
-    Processes fetched data with LLM.
-    Returns (can_continue_without_auth, important_emails_llm_data, processed_events_llm_data)
+    Starts connecting the pooled session in the background so it's ready when a handler needs it.
+    If the attempt fails, McpSessionManager prints its own connection error; nothing more is reported here,
+    and the handler's own get_session call retries and reports the failure.
+    """
+    warmup = asyncio.create_task(get_session(mcp_base_url, user_id, app_name))
+    _warmup_tasks.add(warmup)
+    warmup.add_done_callback(_warmup_tasks.discard)
+    warmup.add_done_callback(lambda task: task.cancelled() or task.exception()) # Marks any error as retrieved
+
+async def close_all_sessions():
+    """Closes every pooled MCP session. Called once when the assistant exits."""
+    await _MCP_SESSIONS.close_all()
+
+
+def _parse_duration_minutes(duration_str: str, default: int = 30) -> int:
+    """Parses a duration like "30m", "1h" or "1h30m" into minutes. Returns default if it can't be parsed or is zero."""
+    match = _DURATION_RE.match(duration_str or "")
+    if not match:
+        return default
+    hours, minutes = match.groups()
+    return int(hours or 0) * 60 + int(minutes or 0) or default
+
+@functools.lru_cache(maxsize=256)
+def _parse_date_and_duration(date_str: str, duration_str: str, today: date) -> tuple[Optional[date], int]:
     """
-    print(f"\n{user_interface.Style.DIM}Performing proactive checks at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}...{user_interface.Style.RESET_ALL}")
+    Parses the find-free-slots prompts: a date ('today', 'tomorrow' or YYYY-MM-DD) and a duration.
+    Returns (None, minutes) if the date isn't valid. today is part of the cache key, so 'today' rolls over at midnight.
+    """
+    date_key = date_str.strip().lower()
+    if date_key == "today":
+        target_date = today
+    elif date_key == "tomorrow":
+        target_date = today + timedelta(days=1)
+    else:
+        match = _SLOT_DATE_RE.match(date_key)
+        try:
+            target_date = date(*map(int, match.groups())) if match else None
+        except ValueError: # Out-of-range parts, e.g. 2025-02-30
+            target_date = None
+    return target_date, _parse_duration_minutes(duration_str)
+
+@functools.lru_cache(maxsize=64)
+def _business_window_iso(target_date: date) -> tuple[str, str, str]:
+    """Returns (time_min_iso, time_max_iso, YYYY-MM-DD) for the 09:00-18:00 IST free-slot query window on target_date."""
+    time_min_dt = datetime(target_date.year, target_date.month, target_date.day, 9, 0, 0, tzinfo=calendar_utils.IST)
+    time_max_dt = datetime(target_date.year, target_date.month, target_date.day, 18, 0, 0, tzinfo=calendar_utils.IST)
+    return (
+        calendar_utils.format_datetime_to_iso_ist(time_min_dt),
+        calendar_utils.format_datetime_to_iso_ist(time_max_dt),
+        target_date.isoformat()
+    )
+
+
+# --- Free-slot Cache ---
+# Editing a draft or handling several emails often asks for the same day/duration again within moments
+FREE_SLOTS_CACHE_TTL_S = 60
+FREE_SLOTS_CACHE_MAX_ENTRIES = 32
+_free_slots_cache: Dict[tuple, tuple[float, List[Dict[str, str]]]] = {}
+
+def _get_cached_free_slots(cache_key: tuple) -> Optional[List[Dict[str, str]]]:
+    """Returns free slots found for this key less than FREE_SLOTS_CACHE_TTL_S ago, else None."""
+    cached = _free_slots_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < FREE_SLOTS_CACHE_TTL_S:
+        return cached[1]
+    return None
+
+def _cache_free_slots(cache_key: tuple, free_slots: List[Dict[str, str]]):
+    _free_slots_cache.pop(cache_key, None) # Re-insert so dict order stays oldest-first
+    if len(_free_slots_cache) >= FREE_SLOTS_CACHE_MAX_ENTRIES:
+        _free_slots_cache.pop(next(iter(_free_slots_cache)))
+    _free_slots_cache[cache_key] = (time.monotonic(), free_slots)
+
+
+# --- Proactive Check Snapshot ---
+# Interactive runs reuse the actionable items saved by a check this recent (see main_assistant_entry)
+PROACTIVE_SNAPSHOT_TTL_S = 30
+
+
+# --- Draft Reply Cache ---
+# Re-drafting with the same instructions (or reverting an edit) reuses the earlier LLM draft
+DRAFT_CACHE_MAX_ENTRIES = 32
+_draft_cache: Dict[tuple, Dict[str, str]] = {}
+
+async def _draft_email_reply_cached(
+    gemini_client: "genai.Client",
+    original_email_data: Dict[str, Any],
+    action_text: str,
+    user_persona: str,
+    user_priorities: str,
+    user_edit_instructions: Optional[str],
+    available_slots: Optional[List[Dict[str, str]]]
+) -> Dict[str, str]:
+    """draft_email_reply_with_llm with FIFO caching of successful drafts."""
+    import llm_processor
+    email_key = original_email_data.get("messageId") or original_email_data.get("threadId")
+    slots_key = tuple(sorted(slot.get("start", "") for slot in available_slots or []))
+    cache_key = (email_key, action_text, user_persona, user_priorities, user_edit_instructions, slots_key)
+    if email_key and cache_key in _draft_cache:
+        return _draft_cache[cache_key]
+
+    draft_info = await llm_processor.draft_email_reply_with_llm(
+        gemini_client, MODEL_NAME,
+        original_email_data,
+        action_text,
+        user_persona,
+        user_priorities,
+        user_edit_instructions=user_edit_instructions,
+        available_slots=available_slots
+    )
+    if email_key and draft_info and not draft_info.get("error"): # Failed drafts are retried next time
+        if len(_draft_cache) >= DRAFT_CACHE_MAX_ENTRIES:
+            _draft_cache.pop(next(iter(_draft_cache)))
+        _draft_cache[cache_key] = draft_info
+    return draft_info
+
+
+# --- Event-creation Parse Cache ---
+# Re-opening "create event" for the same suggestion reuses the earlier parse instead of another Gemini call
+EVENT_PARSE_CACHE_MAX_ENTRIES = 128
+_event_parse_cache: Dict[tuple, Dict[str, Any]] = {}
+
+async def _parse_event_creation_cached(
+    gemini_client: "genai.Client",
+    llm_suggestion_text: str,
+    original_context_text: Optional[str],
+    user_persona: str,
+    user_priorities: str,
+    current_datetime_iso: str
+) -> Dict[str, Any]:
+    """parse_event_creation_details_from_suggestion with an LRU cache of successful parses. Returns a copy the caller may edit."""
+    import llm_processor
+    # Relative dates ("tomorrow") depend on the current time, so the key carries it to the hour
+    cache_key = (llm_suggestion_text, original_context_text or "", user_persona, user_priorities, current_datetime_iso[:13])
+    cached = _event_parse_cache.pop(cache_key, None)
+    if cached is not None:
+        _event_parse_cache[cache_key] = cached # Re-insert as most recently used
+        return copy.deepcopy(cached)
+
+    details = await llm_processor.parse_event_creation_details_from_suggestion(
+        gemini_client, MODEL_NAME,
+        llm_suggestion_text=llm_suggestion_text,
+        original_context_text=original_context_text,
+        user_persona=user_persona,
+        user_priorities=user_priorities,
+        current_datetime_iso=current_datetime_iso
+    )
+    if details and not details.get("error"):
+        if len(_event_parse_cache) >= EVENT_PARSE_CACHE_MAX_ENTRIES:
+            _event_parse_cache.pop(next(iter(_event_parse_cache)))
+        _event_parse_cache[cache_key] = copy.deepcopy(details) # The handler edits its copy in place
+    return details
 
-    user_id = user_config.get(config_manager.USER_EMAIL_KEY)
-    user_persona = user_config.get(config_manager.USER_PERSONA_KEY, "a busy professional")
-    user_priorities = user_config.get(config_manager.USER_PRIORITIES_KEY, "important tasks and communications")
 
-    gmail_base_url = user_config.get(config_manager.GMAIL_MCP_URL_KEY)
-    calendar_base_url = user_config.get(config_manager.CALENDAR_MCP_URL_KEY)
+# --- Main Application Logic (Async now) ---
+async def _fetch_gmail_raw(user_ctx: config_manager.UserContext, now_utc: datetime, on_full_page: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> tuple[List[Dict[str, Any]], bool]:
+    """
+    Gmail half of a proactive cycle: fetches unread mail from the last 24h. Only called when email notifications are on.
+    If given, on_full_page is called with each page that is followed by another page, so its
+    processing can start while the next page is still being fetched.
+    Returns (all_fetched_raw_messages, auth_action_required)
+    """
+    user_id = user_ctx.user_id
+    gmail_base_url = user_ctx.gmail_url
 
     all_fetched_raw_messages = []
-    auth_action_required_overall = False # Flag if any service needs auth
 
     # --- Gmail Check ---
-    if gmail_base_url and user_id and user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("email", "off") != "off":
+    if gmail_base_url and user_id:
         user_interface.print_header("Checking Gmail")
         email_cycle_successful_for_timestamp_update = False
         auth_action_required_for_gmail = False
         try:
-            async with McpSessionManager(gmail_base_url, user_id, "gmail") as gmail_manager:
-                if not gmail_manager.session:
-                    print(f"{user_interface.Fore.RED}Failed to establish Gmail MCP session.{user_interface.Style.RESET_ALL}")
-                else:
-                    # print(f"Gmail tools available (first 5): {list(gmail_manager.tools.keys())[:5]}...")
-
-                    twenty_four_hours_ago_utc = datetime.now(timezone.utc) - timedelta(hours=24)
-                    # last_check_ts_str = user_config.get(config_manager.LAST_EMAIL_CHECK_KEY)
-                    # query_start_dt = twenty_four_hours_ago_utc # Default to 24h
-                    # if last_check_ts_str:
-                    #     last_check_dt = datetime.fromisoformat(last_check_ts_str)
-                    #     # Query for emails newer than last check, but not older than 24h
-                    #     query_start_dt = max(last_check_dt, twenty_four_hours_ago_utc)
-
-                    query_since_timestamp = int(twenty_four_hours_ago_utc.timestamp()) # Sticking to 24h for now
-                    gmail_query = f"is:unread after:{query_since_timestamp}"
-
-                    base_fetch_params = {
-                        "query": gmail_query, "max_results": 10, "include_payload": True
-                    }
-                    current_page_token = None
-                    max_pages_to_fetch = 3
-                    pages_fetched = 0
-
-                    while pages_fetched < max_pages_to_fetch:
-                        pages_fetched += 1
-                        current_fetch_params = base_fetch_params.copy()
-                        if current_page_token:
-                            current_fetch_params["page_token"] = current_page_token
+            gmail_manager = await get_session(gmail_base_url, user_id, GMAIL_APP_NAME)
+            if not gmail_manager.session:
+                print(f"{_RED}Failed to establish Gmail MCP session.{_RESET}")
+            else:
+                log.debug("Gmail tools available (first 5): %s...", list(gmail_manager.tools.keys())[:5])
+
+                twenty_four_hours_ago_utc = now_utc - timedelta(hours=24)
 
-                        # print(f"Attempting GMAIL_FETCH_EMAILS (Page {pages_fetched}) with params: {current_fetch_params}")
-                        email_result_page = await gmail_manager.ensure_auth_and_call_tool("GMAIL_FETCH_EMAILS", current_fetch_params)
+                query_since_timestamp = int(twenty_four_hours_ago_utc.timestamp()) # Sticking to 24h for now
+                gmail_query = f"is:unread after:{query_since_timestamp}"
 
-                        if isinstance(email_result_page, dict) and email_result_page.get("needs_user_action"):
-                            print(f"{user_interface.Fore.YELLOW}Gmail requires authentication. Please follow instructions and re-run.{user_interface.Style.RESET_ALL}")
+                base_fetch_params = {
+                    "query": gmail_query, "max_results": GMAIL_PAGE_SIZE, "include_payload": True
+                }
+                max_pages_to_fetch = GMAIL_MAX_PAGES
+                pages_fetched = 0
+
+                # Prefetch pipeline: as soon as a page's nextPageToken is known, the request for the
+                # following page is put in flight, so it overlaps with the rest of this page's processing.
+                log.debug("Attempting GMAIL_FETCH_EMAILS (Page 1) with params: %s", base_fetch_params)
+                pending_page_task = asyncio.create_task(
+                    gmail_manager.ensure_auth_and_call_tool("GMAIL_FETCH_EMAILS", base_fetch_params, timeout_s=GMAIL_PAGE_TIMEOUT_S)
+                )
+                try:
+                    while pending_page_task:
+                        pages_fetched += 1
+                        try:
+                            email_result_page = await pending_page_task
+                        finally:
+                            pending_page_task = None
+
+                        if isinstance(email_result_page, dict) and email_result_page.get("timeout"):
+                            # Keep whatever pages already arrived rather than stalling the whole cycle
+                            print(f"{_RED}Gmail page {pages_fetched} timed out after {GMAIL_PAGE_TIMEOUT_S:g}s. Continuing with {len(all_fetched_raw_messages)} email(s) fetched so far.{_RESET}")
+                            break
+                        elif isinstance(email_result_page, dict) and email_result_page.get("needs_user_action"):
+                            print(f"{_YELLOW}Gmail requires authentication. Please follow instructions and re-run.{_RESET}")
                             auth_action_required_for_gmail = True
-                            auth_action_required_overall = True
                             break
                         elif isinstance(email_result_page, dict) and email_result_page.get("error"):
-                            print(f"{user_interface.Fore.RED}Error fetching Gmail emails page {pages_fetched}: {email_result_page.get('error')}{user_interface.Style.RESET_ALL}")
-                            current_page_token = None
+                            print(f"{_RED}Error fetching Gmail emails page {pages_fetched}: {email_result_page.get('error')}{_RESET}")
                             break
-                        elif email_result_page and hasattr(email_result_page, 'content'):
-                            if email_result_page.content:
-                                for item in email_result_page.content:
-                                    text_content = getattr(item, 'text', None)
-                                    if text_content:
-                                        try:
-                                            email_data_json_page = json.loads(text_content)
-                                            if email_data_json_page.get("successful") is True:
-                                                messages_on_page = email_data_json_page.get("data", {}).get("messages", [])
-                                                if messages_on_page:
-                                                    # print(f"Found {len(messages_on_page)} email(s) on page {pages_fetched}.")
-                                                    all_fetched_raw_messages.extend(messages_on_page)
-                                                current_page_token = email_data_json_page.get("data", {}).get("nextPageToken")
-                                                if not current_page_token: break
-                                            else:
-                                                error_from_tool = email_data_json_page.get('error', 'Unknown error from GMAIL_FETCH_EMAILS tool.')
-                                                print(f"{user_interface.Fore.RED}Composio GMAIL_FETCH_EMAILS reported not successful for page {pages_fetched}: {error_from_tool}{user_interface.Style.RESET_ALL}")
-                                                current_page_token = None; break
-                                        except json.JSONDecodeError:
-                                            print(f"{user_interface.Fore.RED}Could not parse email page {pages_fetched} as JSON.{user_interface.Style.RESET_ALL}")
-                                            current_page_token = None; break
-                                    else: current_page_token = None; break
-                            else: current_page_token = None; break
-                        else: current_page_token = None; break
-                        if not current_page_token: break
-
-                    if not auth_action_required_for_gmail:
-                        email_cycle_successful_for_timestamp_update = True
+                        elif email_result_page and hasattr(email_result_page, 'content') and email_result_page.content:
+                            # Composio returns the whole page as a single text item, so only that one is decoded
+                            text_content = getattr(email_result_page.content[0], 'text', None)
+                            if not text_content: break
+                            try:
+                                email_data_json_page = loads_tool_text(text_content) # Already decoded during the auth check
+                            except orjson.JSONDecodeError:
+                                print(f"{_RED}Could not parse email page {pages_fetched} as JSON.{_RESET}")
+                                break
+                            if email_data_json_page.get("successful") is not True:
+                                error_from_tool = email_data_json_page.get('error', 'Unknown error from GMAIL_FETCH_EMAILS tool.')
+                                print(f"{_RED}Composio GMAIL_FETCH_EMAILS reported not successful for page {pages_fetched}: {error_from_tool}{_RESET}")
+                                break
+
+                            page_data = email_data_json_page.get("data") or {}
+                            messages_on_page = page_data.get("messages", [])
+                            next_page_token = page_data.get("nextPageToken")
+                            # A short page means the window is exhausted, even if a token came back
+                            if next_page_token and pages_fetched < max_pages_to_fetch and len(messages_on_page) >= GMAIL_PAGE_SIZE:
+                                # The previous request has completed, so the one params dict can be reused
+                                base_fetch_params["page_token"] = next_page_token
+                                pending_page_task = asyncio.create_task(
+                                    gmail_manager.ensure_auth_and_call_tool("GMAIL_FETCH_EMAILS", base_fetch_params, timeout_s=GMAIL_PAGE_TIMEOUT_S)
+                                )
+                                if on_full_page and messages_on_page:
+                                    on_full_page(messages_on_page)
+
+                            if messages_on_page:
+                                if log.isEnabledFor(logging.DEBUG):
+                                    log.debug(f"Found {len(messages_on_page)} email(s) on page {pages_fetched}.")
+                                all_fetched_raw_messages.extend(messages_on_page)
+                finally:
+                    if pending_page_task and not pending_page_task.done():
+                        pending_page_task.cancel() # Don't leave a stray page request behind on errors
+
+                if not auth_action_required_for_gmail:
+                    email_cycle_successful_for_timestamp_update = True
 
             if auth_action_required_for_gmail:
-                return False, [], [] # Signal main to exit for auth
+                return [], True # Signal main to exit for auth
 
             if email_cycle_successful_for_timestamp_update:
                 config_manager.set_last_email_check_timestamp()
-                print(f"{user_interface.Fore.GREEN}Gmail check complete. {len(all_fetched_raw_messages)} unread email(s) in last 24h fetched.{user_interface.Style.RESET_ALL}")
+                print(f"{_GREEN}Gmail check complete. {len(all_fetched_raw_messages)} unread email(s) in last 24h fetched.{_RESET}")
 
 
         except Exception as e:
-            print(f"{user_interface.Fore.RED}Outer error during Gmail processing: {e}{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}Outer error during Gmail processing: {e}{_RESET}")
             # traceback.print_exc()
     else:
-        if user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("email", "off") != "off":
-             print(f"{user_interface.Fore.YELLOW}Gmail MCP URL or User ID not configured. Skipping Gmail checks.{user_interface.Style.RESET_ALL}")
+        print(f"{_YELLOW}Gmail MCP URL or User ID not configured. Skipping Gmail checks.{_RESET}")
 
-    # --- Process Gmail with LLM ---
-    important_emails_llm_data = []
-    if all_fetched_raw_messages and user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("email", "off") == "important":
-        # user_interface.print_header(f"Processing {len(all_fetched_raw_messages)} Gmail messages with LLM")
-        processed_emails_from_llm = await llm_processor.process_emails_with_llm(
-            gemini_client, model_name, all_fetched_raw_messages, user_persona, user_priorities
-        )
-        if processed_emails_from_llm:
-            for pe_data in processed_emails_from_llm:
-                if pe_data.get('is_important'):
-                    important_emails_llm_data.append(pe_data)
-            # print(f"LLM identified {len(important_emails_llm_data)} important email(s).")
-    elif user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("email", "off") == "all":
-        # If "all", treat all fetched as "important" for display, but LLM might not have summarized
-        for raw_email in all_fetched_raw_messages:
-             important_emails_llm_data.append({
-                 "original_email_data": raw_email,
-                 "is_important": True, # For display purposes
-                 "summary": raw_email.get("snippet", "No summary available."), # Use snippet if no LLM summary
-                 "suggested_actions": ["View full email", "Mark as read", "Delete"] # Generic actions
-             })
-        # print(f"Displaying all {len(important_emails_llm_data)} fetched emails (preference: all).")
+    return all_fetched_raw_messages, False
+
+
+async def _nothing_fetched() -> tuple[List[Dict[str, Any]], bool]:
+    """Stands in for a fetch whose notifications are off: no items, no auth needed."""
+    return [], False
 
+def _extract_events(event_data_json: Any) -> List[Dict[str, Any]]:
+    """Pulls the event list out of a GOOGLECALENDAR_FIND_EVENT response (data.event_data.event_data); [] if any level is missing."""
+    if not isinstance(event_data_json, dict): return []
+    data = event_data_json.get("data")
+    if not data: return []
+    event_data_wrapper = data.get("event_data")
+    if not event_data_wrapper: return []
+    return event_data_wrapper.get("event_data") or []
+
+async def _fetch_calendar_raw(user_ctx: config_manager.UserContext, now_utc: datetime) -> tuple[List[Dict[str, Any]], bool]:
+    """
+    Calendar half of a proactive cycle: fetches events for the next 24h. Only called when calendar notifications are on.
+    Returns (raw_calendar_events, auth_action_required)
+    """
+    user_id = user_ctx.user_id
+    calendar_base_url = user_ctx.calendar_url
 
     # --- Calendar Check ---
     raw_calendar_events = []
     auth_action_required_for_calendar = False
-    if calendar_base_url and user_id and user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("calendar", "off") != "off":
+    if calendar_base_url and user_id:
         user_interface.print_header("Checking Calendar")
         try:
-            async with McpSessionManager(calendar_base_url, user_id, "googlecalendar") as calendar_manager:
-                if not calendar_manager.session:
-                    print(f"{user_interface.Fore.RED}Failed to establish Calendar MCP session.{user_interface.Style.RESET_ALL}")
-                else:
-                    # print(f"Calendar tools available (first 5): {list(calendar_manager.tools.keys())[:5]}...")
-                    now_utc = datetime.now(timezone.utc)
-                    time_min_str = now_utc.isoformat().replace("+00:00", "Z")
-                    time_max_str = (now_utc + timedelta(days=1)).isoformat().replace("+00:00", "Z")
-                    calendar_fetch_params = {
-                        "calendarId": "primary", "timeMin": time_min_str,
-                        "timeMax": time_max_str, "max_results": 10,
-                        "singleEvents": True, "order_by": "startTime"
-                    }
-                    # print(f"Attempting GOOGLECALENDAR_FIND_EVENT with params: {calendar_fetch_params}")
-                    event_result = await calendar_manager.ensure_auth_and_call_tool("GOOGLECALENDAR_FIND_EVENT", calendar_fetch_params)
-
-                    if isinstance(event_result, dict) and event_result.get("needs_user_action"):
-                        print(f"{user_interface.Fore.YELLOW}Google Calendar requires authentication. Please follow instructions and re-run.{user_interface.Style.RESET_ALL}")
-                        auth_action_required_for_calendar = True
-                        auth_action_required_overall = True
-                    elif isinstance(event_result, dict) and event_result.get("error"):
-                        print(f"{user_interface.Fore.RED}Error fetching Calendar events: {event_result.get('error')}{user_interface.Style.RESET_ALL}")
-                    elif event_result and hasattr(event_result, 'content'):
-                        if event_result.content:
-                            for item in event_result.content:
-                                text_content = getattr(item, 'text', None)
-                                if text_content:
-                                    try:
-                                        event_data_json = json.loads(text_content)
-                                        actual_events = event_data_json.get("data",{}).get("event_data",{}).get("event_data",[])
-                                        if actual_events:
-                                            raw_calendar_events.extend(actual_events)
-                                    except json.JSONDecodeError:
-                                        print(f"{user_interface.Fore.RED}Could not parse calendar item text as JSON.{user_interface.Style.RESET_ALL}")
-                        print(f"{user_interface.Fore.GREEN}Calendar check complete. {len(raw_calendar_events)} event(s) in next 24h fetched.{user_interface.Style.RESET_ALL}")
+            calendar_manager = await get_session(calendar_base_url, user_id, CALENDAR_APP_NAME)
+            if not calendar_manager.session:
+                print(f"{_RED}Failed to establish Calendar MCP session.{_RESET}")
+            else:
+                log.debug("Calendar tools available (first 5): %s...", list(calendar_manager.tools.keys())[:5])
+                time_min_str = now_utc.strftime("%Y-%m-%dT%H:%M:%SZ")
+                time_max_str = (now_utc + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+                calendar_fetch_params = {
+                    "calendarId": "primary", "timeMin": time_min_str,
+                    "timeMax": time_max_str, "max_results": 10,
+                    "singleEvents": True, "order_by": "startTime"
+                }
+                log.debug("Attempting GOOGLECALENDAR_FIND_EVENT with params: %s", calendar_fetch_params)
+                event_result = await calendar_manager.ensure_auth_and_call_tool("GOOGLECALENDAR_FIND_EVENT", calendar_fetch_params)
+
+                if isinstance(event_result, dict) and event_result.get("needs_user_action"):
+                    print(f"{_YELLOW}Google Calendar requires authentication. Please follow instructions and re-run.{_RESET}")
+                    auth_action_required_for_calendar = True
+                elif isinstance(event_result, dict) and event_result.get("error"):
+                    print(f"{_RED}Error fetching Calendar events: {event_result.get('error')}{_RESET}")
+                elif event_result and hasattr(event_result, 'content'):
+                    if event_result.content:
+                        for item in event_result.content:
+                            text_content = getattr(item, 'text', None)
+                            if text_content:
+                                try:
+                                    event_data_json = loads_tool_text(text_content)
+                                    actual_events = _extract_events(event_data_json)
+                                    if actual_events:
+                                        raw_calendar_events.extend(actual_events)
+                                except orjson.JSONDecodeError:
+                                    print(f"{_RED}Could not parse calendar item text as JSON.{_RESET}")
+                    print(f"{_GREEN}Calendar check complete. {len(raw_calendar_events)} event(s) in next 24h fetched.{_RESET}")
 
             if auth_action_required_for_calendar:
-                return False, important_emails_llm_data, [] # Signal exit for auth
+                return raw_calendar_events, True # Signal exit for auth
 
         except Exception as e:
-            print(f"{user_interface.Fore.RED}Error during Calendar processing: {e}{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}Error during Calendar processing: {e}{_RESET}")
             # traceback.print_exc()
     else:
-        if user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("calendar", "off") != "off":
-            print(f"{user_interface.Fore.YELLOW}Calendar MCP URL or User ID not configured. Skipping Calendar checks.{user_interface.Style.RESET_ALL}")
-
-    if auth_action_required_overall: # If any service triggered auth, exit now
-        return False, important_emails_llm_data, raw_calendar_events
-
-    # --- Process Calendar with LLM ---
-    actionable_events_llm_data = [] # New list for only actionable events
-    if raw_calendar_events and user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("calendar", "off") != "off":
-        processed_events_from_llm_temp = await llm_processor.process_calendar_events_with_llm(
-                    gemini_client,       # The genai.Client instance
-                    model_name,          # The string for the model name
-                    raw_calendar_events,
-                    user_config,         # The user_config dictionary
-                    user_persona,
-                    user_priorities
-                )# CORRECTED ARGUMENTS
-        if processed_events_from_llm_temp:
-            for pe_data in processed_events_from_llm_temp:
-                if pe_data.get('suggested_actions'): # Only include if LLM gave actions
-                    actionable_events_llm_data.append(pe_data)
+        print(f"{_YELLOW}Calendar MCP URL or User ID not configured. Skipping Calendar checks.{_RESET}")
+
+    return raw_calendar_events, False
+
+
+async def perform_proactive_checks(user_config: Dict[str, Any], gemini_client: "genai.Client", model_name: str, user_ctx: Optional[config_manager.UserContext] = None) -> tuple[bool, List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Performs one cycle of proactive checks for Gmail and Calendar.
+    Both services are fetched concurrently, then processed with LLM in a single combined request.
+    user_ctx is built from user_config when the caller hasn't already done so.
+    Returns (can_continue_without_auth, important_emails_llm_data, processed_events_llm_data)
+    """
+    import llm_processor
+    now_utc = datetime.now(timezone.utc) # One clock read; both fetch windows and cache timestamps use it
+    print(f"\n{_DIM}Performing proactive checks at {now_utc.astimezone().strftime('%Y-%m-%d %H:%M:%S')}...{_RESET}")
+
+    if user_ctx is None:
+        user_ctx = config_manager.UserContext.from_config(user_config)
+    user_persona = user_ctx.persona
+    user_priorities = user_ctx.priorities
+
+    notification_prefs = user_config.get(config_manager.NOTIFICATION_PREFS_KEY) or {}
+    email_pref = notification_prefs.get("email", "off")
+    calendar_pref = notification_prefs.get("calendar", "off")
+    email_on = email_pref != "off"
+    calendar_on = calendar_pref != "off"
+    triage_emails = email_pref == "important"
+    if not email_on and not calendar_on:
+        # Nothing could be notified, so skip the MCP sessions and LLM calls entirely
+        config_manager.clear_actionable_data()
+        print(f"{_DIM}Email and calendar notifications are off. Nothing to check.{_RESET}")
+        return True, [], []
+
+    # Verdicts from earlier cycles; the rolling 24h window re-fetches mostly the same unread mail every run
+    triage_fingerprint = config_manager.make_cache_fingerprint(user_persona, user_priorities)
+    email_triage_cache = config_manager.load_email_triage_cache(triage_fingerprint) if triage_emails else {}
+    # Same for event analyses; the key includes 'updated', so an edited event gets a fresh analysis
+    event_analysis_cache = config_manager.load_event_analysis_cache(triage_fingerprint) if calendar_on else {}
+    def event_cache_key(event: Dict[str, Any]) -> Optional[str]:
+        return f"{event['id']}@{event['updated']}" if event.get("id") and event.get("updated") else None
+
+    # Emails are triaged in concurrent EMAIL_TRIAGE_BATCH_SIZE batches. Full Gmail pages start as soon as they
+    # arrive, overlapping the LLM with the next page fetch; they're always a prefix of all_fetched_raw_messages.
+    # The final batch goes into the combined request below.
+    gemini_slots = asyncio.Semaphore(GEMINI_MAX_CONCURRENT_REQUESTS)
+    email_triage_tasks: List[asyncio.Task] = []
+    early_triaged_count = 0
+    def needs_llm_triage(message: Dict[str, Any]) -> bool:
+        # Cached verdicts are reused; automated senders are treated as not important without asking the LLM
+        return message.get("messageId") not in email_triage_cache and not llm_processor.is_low_signal_sender(message)
+    async def triage_email_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        async with gemini_slots:
+            return await llm_processor.process_emails_with_llm(gemini_client, model_name, batch, user_persona, user_priorities)
+    def start_email_triage(messages: List[Dict[str, Any]]) -> None:
+        for i in range(0, len(messages), EMAIL_TRIAGE_BATCH_SIZE):
+            email_triage_tasks.append(asyncio.create_task(triage_email_batch(messages[i:i + EMAIL_TRIAGE_BATCH_SIZE])))
+    def triage_full_page(messages_on_page: List[Dict[str, Any]]) -> None:
+        nonlocal early_triaged_count
+        early_triaged_count += len(messages_on_page)
+        start_email_triage([m for m in messages_on_page if needs_llm_triage(m)])
+
+    # Gmail and Calendar are independent, so run them side by side instead of back to back
+    gmail_outcome, calendar_outcome = await asyncio.gather(
+        _fetch_gmail_raw(user_ctx, now_utc, triage_full_page if triage_emails else None) if email_on else _nothing_fetched(),
+        _fetch_calendar_raw(user_ctx, now_utc) if calendar_on else _nothing_fetched(),
+        return_exceptions=True
+    )
+    if isinstance(gmail_outcome, BaseException):
+        print(f"{_RED}Unexpected error during Gmail check: {gmail_outcome}{_RESET}")
+        gmail_outcome = ([], False)
+        early_triaged_count = 0
+        for task in email_triage_tasks: task.cancel()
+        email_triage_tasks.clear()
+    if isinstance(calendar_outcome, BaseException):
+        print(f"{_RED}Unexpected error during Calendar check: {calendar_outcome}{_RESET}")
+        calendar_outcome = ([], False)
+
+    all_fetched_raw_messages, auth_action_required_for_gmail = gmail_outcome
+    raw_calendar_events, auth_action_required_for_calendar = calendar_outcome
+
+    if auth_action_required_for_gmail or auth_action_required_for_calendar:
+        for task in email_triage_tasks: task.cancel()
+        return False, [], [] # Signal main to exit for auth
+
+    # --- Process Gmail + Calendar with LLM ---
+    # Emails (when triaged by importance) and events share one Gemini request: one round trip, persona sent once
+    emails_for_llm = all_fetched_raw_messages if triage_emails else []
+    events_for_llm = [e for e in raw_calendar_events if event_cache_key(e) not in event_analysis_cache] if calendar_on else []
+    # Pages not already handed to early triage, minus cached and low-signal emails
+    remaining_emails_for_llm = [m for m in emails_for_llm[early_triaged_count:] if needs_llm_triage(m)]
+    # All but the last batch run on their own; the last one shares the request with the events
+    last_batch_start = (len(remaining_emails_for_llm) - 1) // EMAIL_TRIAGE_BATCH_SIZE * EMAIL_TRIAGE_BATCH_SIZE if remaining_emails_for_llm else 0
+    start_email_triage(remaining_emails_for_llm[:last_batch_start])
+    remaining_emails_for_llm = remaining_emails_for_llm[last_batch_start:]
+    llm_batch = {"emails": [], "events": []}
+    if remaining_emails_for_llm or events_for_llm:
+        # user_interface.print_header(f"Processing {len(emails_for_llm)} Gmail messages and {len(events_for_llm)} events with LLM")
+        async with gemini_slots:
+            llm_batch = await llm_processor.process_proactive_batch(
+                gemini_client, model_name, remaining_emails_for_llm, events_for_llm, user_persona, user_priorities
+            )
+
+    processed_emails_from_llm = []
+    for batch_result in await asyncio.gather(*email_triage_tasks, return_exceptions=True):
+        if isinstance(batch_result, BaseException):
+            print(f"{_RED}Error triaging an email batch with LLM: {batch_result}{_RESET}")
+        elif batch_result:
+            processed_emails_from_llm.extend(batch_result)
+    processed_emails_from_llm.extend(llm_batch["emails"])
+
+    if emails_for_llm:
+        # Remember fresh verdicts, then rebuild the full list in fetch order from cache + this cycle's results.
+        # Low-signal senders have no verdict and are left out, which is the same as being not important.
+        verdict_ts = now_utc.isoformat()
+        for pe_data in processed_emails_from_llm:
+            message_id = pe_data.get("original_email_data", {}).get("messageId")
+            if message_id and not pe_data.get("analysis_missing"):
+                email_triage_cache[message_id] = {
+                    "is_important": pe_data.get("is_important", False), "summary": pe_data.get("summary"),
+                    "suggested_actions": pe_data.get("suggested_actions", []), "ts": verdict_ts
+                }
+        if processed_emails_from_llm:
+            config_manager.save_email_triage_cache(email_triage_cache, triage_fingerprint)
+        processed_emails_from_llm = [
+            {"original_email_data": m, "is_important": cached["is_important"], "summary": cached["summary"], "suggested_actions": cached["suggested_actions"]}
+            for m in emails_for_llm if (cached := email_triage_cache.get(m.get("messageId")))
+        ]
+
+    important_emails_llm_data = []
+    if emails_for_llm:
+        important_emails_llm_data = [pe_data for pe_data in processed_emails_from_llm if pe_data.get('is_important')]
+        log.debug("LLM identified %d important email(s).", len(important_emails_llm_data))
+    elif email_pref == "all":
+        # If "all", treat all fetched as "important" for display, but LLM might not have summarized
+        important_emails_llm_data = [{
+            "original_email_data": raw_email,
+            "is_important": True, # For display purposes
+            "summary": raw_email.get("snippet", "No summary available."), # Use snippet if no LLM summary
+            "suggested_actions": _DEFAULT_EMAIL_ACTIONS # Generic actions, shared by every email
+        } for raw_email in all_fetched_raw_messages]
+        log.debug("Displaying all %d fetched emails (preference: all).", len(important_emails_llm_data))
+
+    processed_events_from_llm = llm_batch["events"]
+    if calendar_on and raw_calendar_events:
+        # Remember fresh analyses, then rebuild the full list in fetch order from cache + this cycle's results
+        fresh_events_by_id = {}
+        for pe_data in processed_events_from_llm:
+            original_event = pe_data.get("original_event_data", {})
+            fresh_events_by_id[original_event.get("id")] = pe_data
+            event_key = event_cache_key(original_event)
+            if event_key and not pe_data.get("analysis_missing"):
+                event_analysis_cache[event_key] = {
+                    "summary_llm": pe_data.get("summary_llm"), "suggested_actions": pe_data.get("suggested_actions", []),
+                    "ts": now_utc.isoformat()
+                }
+        if processed_events_from_llm:
+            config_manager.save_event_analysis_cache(event_analysis_cache, triage_fingerprint)
+        processed_events_from_llm = []
+        for raw_event in raw_calendar_events:
+            if (cached := event_analysis_cache.get(event_cache_key(raw_event))):
+                processed_events_from_llm.append({"original_event_data": raw_event, "summary_llm": cached["summary_llm"], "suggested_actions": cached["suggested_actions"]})
+            elif (fresh := fresh_events_by_id.get(raw_event.get("id"))):
+                processed_events_from_llm.append(fresh)
+
+    # Only events the LLM gave actions for
+    actionable_events_llm_data = [pe_data for pe_data in processed_events_from_llm if pe_data.get('suggested_actions')]
 
     # --- Send Notifications ---
     notification_sent_this_cycle = False # Track if a notification was actually sent
     num_imp_emails = len(important_emails_llm_data)
     num_act_events = len(actionable_events_llm_data) # Use this for notification
 
-    if user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("email", "off") != "off" or \
-       user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("calendar", "off") != "off":
-        if num_imp_emails > 0 or num_act_events > 0 : # Or use len(raw_calendar_events) if just notifying about any event
-            notif_title = "Proactive Assistant Update"
-            notif_message_parts = []
-            if num_imp_emails > 0 and user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("email", "off") != "off":
-                notif_message_parts.append(f"{num_imp_emails} important email(s)")
-            if num_act_events > 0 and user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("calendar", "off") != "off": # Check pref again
-                notif_message_parts.append(f"{num_act_events} upcoming event(s) with suggestions")
-            elif len(raw_calendar_events) > 0 and user_config.get(config_manager.NOTIFICATION_PREFS_KEY, {}).get("calendar", "off") != "off":
-                 notif_message_parts.append(f"{len(raw_calendar_events)} upcoming event(s)")
-
-
-            if notif_message_parts:
-                # --- Determine paths for notification action ---
-                python_executable = sys.executable
-                script_file_path_obj = Path(__file__).resolve() # Path object to assistant.py
-                work_dir_obj = script_file_path_obj.parent    # Path object to project directory
-
-                # The action script will be assistant.py itself, and we'll add the flag later
-                # when constructing the command for osascript.
-                # For now, script_to_run_on_action is just the path to assistant.py.
-                # The --from-notification flag will be handled by the command_to_run_in_terminal construction.
-
-                notifier.send_macos_notification(
-                    notif_title,
-                    ", ".join(notif_message_parts) + " requiring attention.",
-                    python_executable_for_action=str(python_executable),
-                    script_to_run_on_action=str(script_file_path_obj), # Just the script path
-                    working_dir_for_action=str(work_dir_obj)
-                )
-                notification_sent_this_cycle = True
+    has_email_items = email_on and num_imp_emails > 0
+    has_event_items = calendar_on and num_act_events > 0
+
+    if has_email_items or has_event_items: # Message parts are only built when there is something to report
+        notif_title = "Proactive Assistant Update"
+        notif_message_parts = []
+        if has_email_items:
+            notif_message_parts.append(f"{num_imp_emails} important email(s)")
+        if has_event_items:
+            notif_message_parts.append(f"{num_act_events} upcoming event(s) with suggestions")
+        elif calendar_on and raw_calendar_events:
+            notif_message_parts.append(f"{len(raw_calendar_events)} upcoming event(s)")
+
+        # --- Determine paths for notification action ---
+        python_executable = sys.executable
+        script_file_path_obj = Path(__file__).resolve() # Path object to assistant.py
+        work_dir_obj = script_file_path_obj.parent    # Path object to project directory
+
+        # The action script will be assistant.py itself, and we'll add the flag later
+        # when constructing the command for osascript.
+        # For now, script_to_run_on_action is just the path to assistant.py.
+        # The --from-notification flag will be handled by the command_to_run_in_terminal construction.
+
+        import notifier
+        notifier.send_macos_notification(
+            notif_title,
+            ", ".join(notif_message_parts) + " requiring attention.",
+            python_executable_for_action=str(python_executable),
+            script_to_run_on_action=str(script_file_path_obj), # Just the script path
+            working_dir_for_action=str(work_dir_obj)
+        )
+        notification_sent_this_cycle = True
 
-        else: # No important items
-            if sys.stdin.isatty(): # Only print if interactive
-                print(f"{user_interface.Style.DIM}No new important items for notification this cycle.{user_interface.Style.RESET_ALL}")
-            else: # Log for non-interactive runs
-                print(f"NOTIF_LOG: No new important items for notification this cycle at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    elif email_on or calendar_on: # No important items
+        if sys.stdin.isatty(): # Only print if interactive
+            print(f"{_DIM}No new important items for notification this cycle.{_RESET}")
+        else: # Log for non-interactive runs
+            log.info("NOTIF_LOG: No new important items for notification this cycle at %s", now_utc) # Formatted only if emitted
 
     # +++++++++++++ SAVE ACTIONABLE DATA IF NOTIFICATION WAS SENT +++++++++++++
     if notification_sent_this_cycle: # Only save if we actually notified the user
@@ -539,99 +958,91 @@ async def perform_proactive_checks(user_config: Dict[str, Any], gemini_client: g
     else: # If no notification, clear any old actionable data
         config_manager.clear_actionable_data()
 
-    print(f"{user_interface.Style.DIM}Proactive checks cycle complete.{user_interface.Style.RESET_ALL}")
+    print(f"{_DIM}Proactive checks cycle complete.{_RESET}")
     return True, important_emails_llm_data, actionable_events_llm_data # Return the filtered list
 
 
+async def _find_free_slots_interactive(
+    user_ctx: config_manager.UserContext,
+    default_duration_str: str = "30m"
+) -> Optional[tuple[List[Dict[str, str]], int]]:
+    """
+    Asks for a date and meeting duration, finds free slots in that day's working window and displays them.
+    Recent results are reused from the free-slot cache. Returns (free_slots, meeting_duration_minutes),
+    or None if the date was invalid or the lookup failed (the reason is printed).
+    """
+    calendar_mcp_url = user_ctx.calendar_url
+    user_id = user_ctx.user_id
+    date_str = user_interface.get_user_input("Enter date to find free slots (YYYY-MM-DD, 'today', 'tomorrow')", default="today")
+    duration_str = user_interface.get_user_input("Desired meeting duration for slots (e.g., 30m, 1h)", default=default_duration_str)
+
+    target_date, meeting_duration_minutes = _parse_date_and_duration(date_str, duration_str, datetime.now(calendar_utils.IST).date())
+    if not target_date:
+        print(f"{_RED}Invalid date format for finding slots.{_RESET}")
+        return None
+
+    time_min_iso, time_max_iso, parsed_target_date_str = _business_window_iso(target_date)
+    work_start_h = user_ctx.work_start_hour
+    work_end_h = user_ctx.work_end_hour
+
+    slots_cache_key = (calendar_mcp_url, user_id, target_date, meeting_duration_minutes, work_start_h, work_end_h)
+    free_slots = _get_cached_free_slots(slots_cache_key)
+    if free_slots is None:
+        print(f"{_DIM}Establishing session to find free slots...{_RESET}")
+        slot_finder_manager = await get_session(calendar_mcp_url, user_id, CALENDAR_APP_NAME)
+        if not slot_finder_manager.session:
+            print(f"{_RED}Could not establish session to find free slots.{_RESET}")
+            return None
+        free_slots_result = await slot_finder_manager.get_calendar_free_slots(
+            time_min_iso_ist=time_min_iso,
+            time_max_iso_ist=time_max_iso,
+            meeting_duration_minutes=meeting_duration_minutes,
+            user_work_start_hour=work_start_h, # Pass configured hours
+            user_work_end_hour=work_end_h      # Pass configured hours
+        )
+        if not free_slots_result.get("successful"):
+            print(f"{_RED}Error finding free slots: {free_slots_result.get('error')}{_RESET}")
+            return None
+        free_slots = free_slots_result.get("free_slots", [])
+        _cache_free_slots(slots_cache_key, free_slots)
+
+    user_interface.display_free_slots(free_slots, parsed_target_date_str) # Also reports an empty result
+    return free_slots, meeting_duration_minutes
+
+
 async def handle_draft_email_reply(
-    gemini_client: genai.Client, model_name: str,
+    gemini_client: "genai.Client", model_name: str,
     chosen_email_data: Dict[str, Any],
     initial_llm_action_text: str,
-    user_config: Dict[str, Any]
+    user_ctx: config_manager.UserContext
     # No McpSessionManagers passed in directly; they will be created internally for actions
 ) -> bool: # Returns True if action was processed (even if cancelled by user), False on critical error
-    user_persona = user_config.get(config_manager.USER_PERSONA_KEY, "a professional")
-    user_priorities = user_config.get(config_manager.USER_PRIORITIES_KEY, "key tasks")
+    user_persona = user_ctx.persona
+    user_priorities = user_ctx.priorities
 
     # Get URLs and user_id for potential MCP calls
-    gmail_mcp_url = user_config.get(config_manager.GMAIL_MCP_URL_KEY)
-    calendar_mcp_url = user_config.get(config_manager.CALENDAR_MCP_URL_KEY) # For finding slots
-    user_id = user_config.get(config_manager.USER_EMAIL_KEY)
+    gmail_mcp_url = user_ctx.gmail_url
+    calendar_mcp_url = user_ctx.calendar_url # For finding slots
+    user_id = user_ctx.user_id
 
     current_draft_info = None
     available_slots_for_llm: Optional[List[Dict[str, str]]] = None
 
     # --- Conditionally Find Free Slots ---
-    if calendar_mcp_url and user_id and \
-       ("availability" in initial_llm_action_text.lower() or \
-        "times" in initial_llm_action_text.lower() or \
-        "slots" in initial_llm_action_text.lower() or \
-        "propose" in initial_llm_action_text.lower() or \
-        "slot" in initial_llm_action_text.lower() or \
-        "time" in initial_llm_action_text.lower() or \
-        "free" in initial_llm_action_text.lower() or \
-        "suggest time" in initial_llm_action_text.lower()):
+    if calendar_mcp_url and user_id and _SLOT_TRIGGER_RE.search(initial_llm_action_text or ""):
 
         if user_interface.get_yes_no_input("Do you want to check your calendar for free slots to suggest in this email reply?", default_yes=True):
-            date_str = user_interface.get_user_input("Enter date to find free slots (YYYY-MM-DD, 'today', 'tomorrow')", default="today")
-            duration_str = user_interface.get_user_input("Desired meeting duration for slots (e.g., 30m, 1h)", default="30m")
-
-            meeting_duration_minutes = 30
-            try:
-                if 'h' in duration_str:
-                    parts = duration_str.split('h')
-                    hours = int(parts[0])
-                    minutes_part = parts[1].replace('m','')
-                    minutes = int(minutes_part) if minutes_part else 0
-                    meeting_duration_minutes = (hours * 60) + minutes
-                elif 'm' in duration_str:
-                    meeting_duration_minutes = int(duration_str.replace('m',''))
-            except ValueError: meeting_duration_minutes = 30 # Default on parse error
-
-            target_date = None
-            now_ist = datetime.now(calendar_utils.IST)
-            if date_str.lower() == "today": target_date = now_ist.date()
-            elif date_str.lower() == "tomorrow": target_date = (now_ist + timedelta(days=1)).date()
-            else:
-                try: target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                except ValueError: print(f"{user_interface.Fore.RED}Invalid date format for finding slots.{user_interface.Style.RESET_ALL}")
-
-            if target_date:
-                time_min_dt = datetime(target_date.year, target_date.month, target_date.day, 9, 0, 0, tzinfo=calendar_utils.IST)
-                time_max_dt = datetime(target_date.year, target_date.month, target_date.day, 18, 0, 0, tzinfo=calendar_utils.IST)
-                time_min_iso = calendar_utils.format_datetime_to_iso_ist(time_min_dt)
-                time_max_iso = calendar_utils.format_datetime_to_iso_ist(time_max_dt)
-                work_start_h = user_config.get(config_manager.WORK_START_HOUR_KEY, 9) # Default 9
-                work_end_h = user_config.get(config_manager.WORK_END_HOUR_KEY, 18)   # Default 18
-                parsed_target_date_str = target_date.strftime("%Y-%m-%d")
-
-                print(f"{user_interface.Style.DIM}Establishing session to find free slots...{user_interface.Style.RESET_ALL}")
-                async with McpSessionManager(calendar_mcp_url, user_id, "googlecalendar-findslots-for-email") as slot_finder_manager:
-                    if slot_finder_manager.session:
-                        free_slots_result = await slot_finder_manager.get_calendar_free_slots(
-                            time_min_iso_ist=time_min_iso, # Corrected from just time_min_iso
-                            time_max_iso_ist=time_max_iso, # Corrected from just time_max_iso
-                            meeting_duration_minutes=meeting_duration_minutes,
-                            user_work_start_hour=work_start_h, # Pass configured hours
-                            user_work_end_hour=work_end_h      # Pass configured hours
-                        )
-                        if free_slots_result.get("successful"):
-                            available_slots_for_llm = free_slots_result.get("free_slots", [])
-                            if available_slots_for_llm:
-                                print(f"{user_interface.Fore.GREEN}Found {len(available_slots_for_llm)} free slots. They will be provided to the LLM.{user_interface.Style.RESET_ALL}")
-                                user_interface.display_free_slots(available_slots_for_llm, parsed_target_date_str)
-                            else:
-                                print(f"{user_interface.Fore.YELLOW}No free slots found for the specified criteria.{user_interface.Style.RESET_ALL}")
-                        else:
-                            print(f"{user_interface.Fore.RED}Error finding free slots: {free_slots_result.get('error')}{user_interface.Style.RESET_ALL}")
-                    else:
-                        print(f"{user_interface.Fore.RED}Could not establish session to find free slots.{user_interface.Style.RESET_ALL}")
-            # If target_date was not set due to invalid input, available_slots_for_llm remains None
+            slots_lookup = await _find_free_slots_interactive(user_ctx)
+            if slots_lookup:
+                available_slots_for_llm = slots_lookup[0]
+                if available_slots_for_llm:
+                    print(f"{_GREEN}Found {len(available_slots_for_llm)} free slots. They will be provided to the LLM.{_RESET}")
+            # If the date was invalid or the lookup failed, available_slots_for_llm remains None
 
     # Initial draft generation
-    print(f"\n{user_interface.Style.DIM}Drafting reply for '{chosen_email_data['original_email_data'].get('subject', 'N/A')}'...{user_interface.Style.RESET_ALL}")
-    current_draft_info = await llm_processor.draft_email_reply_with_llm(
-        gemini_client, MODEL_NAME,
+    print(f"\n{_DIM}Drafting reply for '{chosen_email_data['original_email_data'].get('subject', 'N/A')}'...{_RESET}")
+    current_draft_info = await _draft_email_reply_cached(
+        gemini_client,
         chosen_email_data['original_email_data'],
         initial_llm_action_text,
         user_persona,
@@ -644,7 +1055,7 @@ async def handle_draft_email_reply(
     while True:
         if not current_draft_info or current_draft_info.get("error"):
             error_msg = current_draft_info.get("error", "Failed to generate draft.") if current_draft_info else "Failed to generate draft."
-            print(f"{user_interface.Fore.RED}Error: {error_msg}{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}Error: {error_msg}{_RESET}")
             return False
 
         draft_body = current_draft_info.get("body")
@@ -660,61 +1071,64 @@ async def handle_draft_email_reply(
             original_thread_id = current_draft_info.get("original_thread_id")
 
             if not recipient_for_reply or recipient_for_reply == "Unknown Sender" or "@" not in recipient_for_reply:
-                 print(f"{user_interface.Fore.RED}Cannot send reply: Valid recipient email not found. Found: '{recipient_for_reply}'{user_interface.Style.RESET_ALL}")
+                 print(f"{_RED}Cannot send reply: Valid recipient email not found. Found: '{recipient_for_reply}'{_RESET}")
                  return False
             if not original_thread_id or not draft_body:
-                 print(f"{user_interface.Fore.RED}Critical reply information missing (thread ID or body). Cannot send.{user_interface.Style.RESET_ALL}")
+                 print(f"{_RED}Critical reply information missing (thread ID or body). Cannot send.{_RESET}")
                  return False
             if not gmail_mcp_url or not user_id:
-                print(f"{user_interface.Fore.RED}Gmail configuration missing. Cannot send reply.{user_interface.Style.RESET_ALL}")
+                print(f"{_RED}Gmail configuration missing. Cannot send reply.{_RESET}")
                 return False
 
-            print(f"{user_interface.Style.DIM}Establishing session to send Gmail reply...{user_interface.Style.RESET_ALL}")
-            async with McpSessionManager(gmail_mcp_url, user_id, "gmail-action-send-reply") as exec_gmail_manager:
-                if not exec_gmail_manager.session:
-                    print(f"{user_interface.Fore.RED}Failed to establish Gmail session for sending reply.{user_interface.Style.RESET_ALL}")
-                    return False
+            print(f"{_DIM}Establishing session to send Gmail reply...{_RESET}")
+            exec_gmail_manager = await get_session(gmail_mcp_url, user_id, GMAIL_APP_NAME)
+            if not exec_gmail_manager.session:
+                print(f"{_RED}Failed to establish Gmail session for sending reply.{_RESET}")
+                return False
 
-                send_reply_outcome = await exec_gmail_manager.reply_to_gmail_thread(
-                    thread_id=original_thread_id,
-                    recipient_email=recipient_for_reply,
-                    message_body=draft_body
-                )
+            send_reply_outcome = await exec_gmail_manager.reply_to_gmail_thread(
+                thread_id=original_thread_id,
+                recipient_email=recipient_for_reply,
+                message_body=draft_body
+            )
 
-                if send_reply_outcome.get("successful"):
-                    print(f"{user_interface.Fore.GREEN}Success! {send_reply_outcome.get('message', 'Reply sent.')}{user_interface.Style.RESET_ALL}")
-                    # +++++++++++++ MARK THREAD AS READ +++++++++++++
-                    # original_message_id = chosen_email_data.get("original_email_data", {}).get("messageId") # We need threadId now
-                    original_thread_id_for_mark = chosen_email_data.get("original_email_data", {}).get("threadId")
+            if send_reply_outcome.get("successful"):
+                print(f"{_GREEN}Success! {send_reply_outcome.get('message', 'Reply sent.')}{_RESET}")
+                # +++++++++++++ MARK THREAD AS READ +++++++++++++
+                # original_message_id = chosen_email_data.get("original_email_data", {}).get("messageId") # We need threadId now
+                original_thread_id_for_mark = chosen_email_data.get("original_email_data", {}).get("threadId")
 
-                    if original_thread_id_for_mark: # Make sure we have a threadId
-                        print(f"{user_interface.Style.DIM}Attempting to mark original email thread ({original_thread_id_for_mark}) as read...{user_interface.Style.RESET_ALL}")
+                if original_thread_id_for_mark: # Make sure we have a threadId
+                    print(f"{_DIM}Attempting to mark original email thread ({original_thread_id_for_mark}) as read...{_RESET}")
 
-                        mark_read_outcome = await exec_gmail_manager.mark_thread_as_read( # Call new method
-                            thread_id=original_thread_id_for_mark
-                        )
+                    mark_read_outcome = await exec_gmail_manager.mark_thread_as_read( # Call new method
+                        thread_id=original_thread_id_for_mark
+                    )
 
-                        if mark_read_outcome.get("successful"):
-                            print(f"{user_interface.Fore.GREEN}Original email thread marked as read.{user_interface.Style.RESET_ALL}")
-                        else:
-                            print(f"{user_interface.Fore.YELLOW}Could not mark original email thread as read: {mark_read_outcome.get('error')}{user_interface.Style.RESET_ALL}")
+                    if mark_read_outcome.get("successful"):
+                        print(f"{_GREEN}Original email thread marked as read.{_RESET}")
                     else:
-                        print(f"{user_interface.Fore.YELLOW}Could not find threadId for original email to mark as read.{user_interface.Style.RESET_ALL}")
-                    # ++++++++++++++++++++++++++++++++++++++++++++++++
-                    return True
+                        print(f"{_YELLOW}Could not mark original email thread as read: {mark_read_outcome.get('error')}{_RESET}")
                 else:
-                    error_msg = send_reply_outcome.get('error', 'Failed to send reply via MCP.')
-                    print(f"{user_interface.Fore.RED}MCP Error sending reply: {error_msg}{user_interface.Style.RESET_ALL}")
-                if send_reply_outcome.get("successful"):
-                    return True # The 'send_reply' action was successful
+                    print(f"{_YELLOW}Could not find threadId for original email to mark as read.{_RESET}")
+                # ++++++++++++++++++++++++++++++++++++++++++++++++
+                return True
+            else:
+                error_msg = send_reply_outcome.get('error', 'Failed to send reply via MCP.')
+                if send_reply_outcome.get("outcome_unknown"): # Timed out; the reply may still have been sent
+                    print(f"{_YELLOW}Reply outcome unknown: {error_msg}{_RESET}")
                 else:
-                    return False # The 'send_reply' action failed
+                    print(f"{_RED}MCP Error sending reply: {error_msg}{_RESET}")
+            if send_reply_outcome.get("successful"):
+                return True # The 'send_reply' action was successful
+            else:
+                return False # The 'send_reply' action failed
 
         elif confirmation_choice == "edit":
-            user_edit_instructions = user_interface.get_user_input(f"{user_interface.Fore.CYAN}Your edit instructions (or type your full new draft):{user_interface.Style.RESET_ALL}")
-            print(f"{user_interface.Style.DIM}Re-drafting with your instructions...{user_interface.Style.RESET_ALL}")
-            current_draft_info = await llm_processor.draft_email_reply_with_llm(
-                gemini_client, MODEL_NAME,
+            user_edit_instructions = user_interface.get_user_input(f"{_CYAN}Your edit instructions (or type your full new draft):{_RESET}")
+            print(f"{_DIM}Re-drafting with your instructions...{_RESET}")
+            current_draft_info = await _draft_email_reply_cached(
+                gemini_client,
                 chosen_email_data['original_email_data'],
                 initial_llm_action_text,
                 user_persona,
@@ -725,18 +1139,18 @@ async def handle_draft_email_reply(
             # Loop continues
 
         elif confirmation_choice == "cancel":
-            print(f"{user_interface.Fore.YELLOW}Drafting and replying cancelled.{user_interface.Style.RESET_ALL}")
+            print(f"{_YELLOW}Drafting and replying cancelled.{_RESET}")
             return True
 
         else:
-            print(f"{user_interface.Fore.RED}Unknown confirmation choice in email reply handler.{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}Unknown confirmation choice in email reply handler.{_RESET}")
             return False
 
 # assistant.py
 
 async def handle_delete_calendar_event(
     chosen_event_data: Dict[str, Any],
-    user_config: Dict[str, Any]
+    user_ctx: config_manager.UserContext
     # REMOVE calendar_mcp_manager from parameters
 ) -> bool:
     original_event_details = chosen_event_data.get("original_event_data", {})
@@ -744,7 +1158,7 @@ async def handle_delete_calendar_event(
     event_title = original_event_details.get("summary", "Unknown Event")
 
     if not event_id_to_delete:
-        print(f"{user_interface.Fore.RED}Error: Could not find Event ID for '{event_title}'. Cannot delete.{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}Error: Could not find Event ID for '{event_title}'. Cannot delete.{_RESET}")
         return False
 
     confirm_delete = user_interface.get_confirmation(
@@ -753,34 +1167,39 @@ async def handle_delete_calendar_event(
     )
 
     if confirm_delete:
-        calendar_mcp_url = user_config.get(config_manager.CALENDAR_MCP_URL_KEY)
-        user_id = user_config.get(config_manager.USER_EMAIL_KEY)
+        calendar_mcp_url = user_ctx.calendar_url
+        user_id = user_ctx.user_id
         if not calendar_mcp_url or not user_id:
-            print(f"{user_interface.Fore.RED}Calendar configuration missing for delete action.{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}Calendar configuration missing for delete action.{_RESET}")
             return False
 
-        print(f"{user_interface.Style.DIM}Establishing session to delete calendar event '{event_title}'...{user_interface.Style.RESET_ALL}")
-        async with McpSessionManager(calendar_mcp_url, user_id, "googlecalendar-action-delete-EXECUTE") as exec_cal_manager:
-            if not exec_cal_manager.session:
-                print(f"{user_interface.Fore.RED}Failed to establish session for deleting event.{user_interface.Style.RESET_ALL}")
-                return False
+        print(f"{_DIM}Establishing session to delete calendar event '{event_title}'...{_RESET}")
+        exec_cal_manager = await get_session(calendar_mcp_url, user_id, CALENDAR_APP_NAME)
+        if not exec_cal_manager.session:
+            print(f"{_RED}Failed to establish session for deleting event.{_RESET}")
+            return False
 
-            delete_outcome = await exec_cal_manager.delete_calendar_event(event_id=event_id_to_delete)
+        delete_outcome = await exec_cal_manager.delete_calendar_event(event_id=event_id_to_delete)
 
         if delete_outcome.get("successful"):
-            print(f"{user_interface.Fore.GREEN}Success! {delete_outcome.get('message', f'Event {event_title} deleted.')}{user_interface.Style.RESET_ALL}")
+            _free_slots_cache.clear() # The calendar changed, so cached free slots may be wrong
+            print(f"{_GREEN}Success! {delete_outcome.get('message', f'Event {event_title} deleted.')}{_RESET}")
             return True
         else:
             error_msg = delete_outcome.get('error', 'Failed to delete event via MCP.')
-            print(f"{user_interface.Fore.RED}MCP Error deleting event: {error_msg}{user_interface.Style.RESET_ALL}")
+            if delete_outcome.get("outcome_unknown"): # Timed out; the change may still have been applied
+                _free_slots_cache.clear()
+                print(f"{_YELLOW}Outcome unknown while deleting event: {error_msg}{_RESET}")
+            else:
+                print(f"{_RED}MCP Error deleting event: {error_msg}{_RESET}")
             return False
     else:
-        print(f"{user_interface.Fore.YELLOW}Event deletion cancelled by user.{user_interface.Style.RESET_ALL}")
+        print(f"{_YELLOW}Event deletion cancelled by user.{_RESET}")
         return True
 
 async def handle_update_calendar_event(
     chosen_event_data: Dict[str, Any],
-    user_config: Dict[str, Any]
+    user_ctx: config_manager.UserContext
     # No McpSessionManager passed directly for the whole function's lifetime
 ) -> bool:
     original_event_details = chosen_event_data.get("original_event_data", {})
@@ -788,144 +1207,86 @@ async def handle_update_calendar_event(
     event_title = original_event_details.get("summary", "Unknown Event")
 
     if not event_id_to_update:
-        print(f"{user_interface.Fore.RED}Error: Could not find Event ID for '{event_title}'. Cannot update.{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}Error: Could not find Event ID for '{event_title}'. Cannot update.{_RESET}")
         return False
 
     # Get calendar URL and user_id for potential MCP calls
-    calendar_mcp_url = user_config.get(config_manager.CALENDAR_MCP_URL_KEY)
-    user_id = user_config.get(config_manager.USER_EMAIL_KEY)
+    calendar_mcp_url = user_ctx.calendar_url
+    user_id = user_ctx.user_id
     if not calendar_mcp_url or not user_id:
-        print(f"{user_interface.Fore.RED}Calendar configuration missing. Cannot perform calendar actions.{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}Calendar configuration missing. Cannot perform calendar actions.{_RESET}")
         return False
 
     # Loop to allow finding free slots and then returning to edit/confirm updates
-    # This loop primarily collects data into `current_update_payload`
-    current_update_payload: Optional[Dict[str, Any]] = {} # Start with empty updates
-
     while True:
-        # Pass current_update_payload to UI so it can show current staged changes
-        # get_event_update_choices needs to be adapted to take current_update_payload
-        # and merge new edits into it or use its values as defaults.
-        # For simplicity now, let's assume get_event_update_choices starts fresh each time
-        # OR that it returns the *complete set of updates* the user wants for the save action.
-        # The version of get_event_update_choices you have does build up 'updates' internally.
-
         ui_outcome = user_interface.get_event_update_choices( # This function builds the 'updates' dict
             event_title,
             original_event_details
         )
 
         if not ui_outcome: # User cancelled the entire update process from the menu
-            print(f"{user_interface.Fore.YELLOW}Event update cancelled.{user_interface.Style.RESET_ALL}")
+            print(f"{_YELLOW}Event update cancelled.{_RESET}")
             return True # User action, not a failure
 
         if isinstance(ui_outcome, dict) and ui_outcome.get("trigger_action") == "find_free_slots":
-            # ... (logic to ask for date/duration for find_free_slots) ...
-            # ... (call mcp_handler.get_calendar_free_slots by opening a temp McpSessionManager) ...
-            print(f"\n{user_interface.Style.DIM}Finding free slots for '{event_title}'...{user_interface.Style.RESET_ALL}")
-            date_str = user_interface.get_user_input("Enter date (YYYY-MM-DD, 'today', 'tomorrow')", default="today")
-            duration_str = user_interface.get_user_input("Desired duration (e.g., 30m, 1h)", default="30m")
-            # Parse date_str and duration_str...
-            # ... (same parsing as in handle_create_calendar_event) ...
-            meeting_duration_minutes = 30 # Placeholder
-            time_min_iso, time_max_iso, parsed_target_date_str = "","","" # Placeholder
-            # (Full date/duration parsing and time_min/max construction needed here)
-            try:
-                _meeting_duration_minutes = 30
-                if 'h' in duration_str:
-                    _hours = int(duration_str.split('h')[0])
-                    _minutes_part = duration_str.split('h')[1].replace('m','')
-                    _minutes = int(_minutes_part) if _minutes_part else 0
-                    _meeting_duration_minutes = (_hours * 60) + _minutes
-                elif 'm' in duration_str:
-                    _meeting_duration_minutes = int(duration_str.replace('m',''))
-
-                _target_date = None
-                _now_ist = datetime.now(calendar_utils.IST)
-                if date_str.lower() == "today": _target_date = _now_ist.date()
-                elif date_str.lower() == "tomorrow": _target_date = (_now_ist + timedelta(days=1)).date()
-                else: _target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-                _time_min_dt = datetime(_target_date.year, _target_date.month, _target_date.day, 9,0,0, tzinfo=calendar_utils.IST)
-                _time_max_dt = datetime(_target_date.year, _target_date.month, _target_date.day, 18,0,0, tzinfo=calendar_utils.IST)
-                time_min_iso = calendar_utils.format_datetime_to_iso_ist(_time_min_dt)
-                time_max_iso = calendar_utils.format_datetime_to_iso_ist(_time_max_dt)
-                work_start_h = user_config.get(config_manager.WORK_START_HOUR_KEY, 9) # Default 9
-                work_end_h = user_config.get(config_manager.WORK_END_HOUR_KEY, 18)   # Default 18
-                parsed_target_date_str = _target_date.strftime("%Y-%m-%d")
-                meeting_duration_minutes = _meeting_duration_minutes
-
-
-                async with McpSessionManager(calendar_mcp_url, user_id, "googlecalendar-findslots-in-update") as slot_finder_manager:
-                    if slot_finder_manager.session:
-                        free_slots_result = await slot_finder_manager.get_calendar_free_slots(
-                            time_min_iso_ist=time_min_iso, # Corrected from just time_min_iso
-                            time_max_iso_ist=time_max_iso, # Corrected from just time_max_iso
-                            meeting_duration_minutes=meeting_duration_minutes,
-                            user_work_start_hour=work_start_h, # Pass configured hours
-                            user_work_end_hour=work_end_h      # Pass configured hours
-                        )
-
-                        if free_slots_result.get("successful"):
-                            user_interface.display_free_slots(free_slots_result.get("free_slots", []), parsed_target_date_str)
-                        else:
-                            print(f"{user_interface.Fore.RED}Error finding free slots: {free_slots_result.get('error')}{user_interface.Style.RESET_ALL}")
-                    else:
-                        print(f"{user_interface.Fore.RED}Could not establish session to find free slots.{user_interface.Style.RESET_ALL}")
-            except ValueError:
-                 print(f"{user_interface.Fore.RED}Invalid date or duration for finding slots.{user_interface.Style.RESET_ALL}")
-
+            print(f"\n{_DIM}Finding free slots for '{event_title}'...{_RESET}")
+            await _find_free_slots_interactive(user_ctx)
 
-            print(f"\n{user_interface.Style.DIM}You can now use this information to set 'Start Datetime' and 'Duration'.{user_interface.Style.RESET_ALL}")
-            current_update_payload = {} # Reset updates as user will re-enter or confirm them
+            print(f"\n{_DIM}You can now use this information to set 'Start Datetime' and 'Duration'.{_RESET}")
             continue # Go back to "What would you like to update?" menu
 
         # If it's not a trigger, it's the 'updates' dictionary from user pressing 's'
         final_updates_for_api = ui_outcome
 
-        print(f"{user_interface.Style.DIM}Establishing session to update calendar event '{event_title}'...{user_interface.Style.RESET_ALL}")
-        async with McpSessionManager(calendar_mcp_url, user_id, "googlecalendar-action-update-EXECUTE") as exec_cal_manager:
-            if not exec_cal_manager.session:
-                print(f"{user_interface.Fore.RED}Failed to establish session for final update.{user_interface.Style.RESET_ALL}")
-                return False # Critical failure
+        print(f"{_DIM}Establishing session to update calendar event '{event_title}'...{_RESET}")
+        exec_cal_manager = await get_session(calendar_mcp_url, user_id, CALENDAR_APP_NAME)
+        if not exec_cal_manager.session:
+            print(f"{_RED}Failed to establish session for final update.{_RESET}")
+            return False # Critical failure
 
-            print(f"{user_interface.Style.DIM}Attempting to commit updates: {final_updates_for_api}...{user_interface.Style.RESET_ALL}")
-            update_outcome = await exec_cal_manager.update_calendar_event(
-                event_id=event_id_to_update,
-                updates=final_updates_for_api
-            )
+        print(f"{_DIM}Attempting to commit updates: {final_updates_for_api}...{_RESET}")
+        update_outcome = await exec_cal_manager.update_calendar_event(
+            event_id=event_id_to_update,
+            updates=final_updates_for_api
+        )
 
         if update_outcome.get("successful"):
-            print(f"{user_interface.Fore.GREEN}Success! {update_outcome.get('message', f'Event {event_title} updated.')}{user_interface.Style.RESET_ALL}")
+            _free_slots_cache.clear() # The calendar changed, so cached free slots may be wrong
+            print(f"{_GREEN}Success! {update_outcome.get('message', f'Event {event_title} updated.')}{_RESET}")
             return True
         else:
             error_msg = update_outcome.get('error', 'Failed to update event via MCP.')
-            print(f"{user_interface.Fore.RED}MCP Error updating event: {error_msg}{user_interface.Style.RESET_ALL}")
+            if update_outcome.get("outcome_unknown"): # Timed out; the change may still have been applied
+                _free_slots_cache.clear()
+                print(f"{_YELLOW}Outcome unknown while updating event: {error_msg}{_RESET}")
+            else:
+                print(f"{_RED}MCP Error updating event: {error_msg}{_RESET}")
             return False
 
 
 
 async def handle_create_calendar_event(
-    gemini_client: genai.Client, model_name: str,
+    gemini_client: "genai.Client", model_name: str,
     llm_suggestion_text: str,
     original_context_text: Optional[str],
-    user_config: Dict[str, Any]
+    user_ctx: config_manager.UserContext
     # No McpSessionManager passed directly
 ) -> bool:
-    user_persona = user_config.get(config_manager.USER_PERSONA_KEY, "a professional")
-    user_priorities = user_config.get(config_manager.USER_PRIORITIES_KEY, "key tasks")
+    user_persona = user_ctx.persona
+    user_priorities = user_ctx.priorities
     current_time_for_llm_context = datetime.now(timezone.utc).isoformat()
 
-    calendar_mcp_url = user_config.get(config_manager.CALENDAR_MCP_URL_KEY) # For MCP calls
-    user_id = user_config.get(config_manager.USER_EMAIL_KEY)
+    calendar_mcp_url = user_ctx.calendar_url # For MCP calls
+    user_id = user_ctx.user_id
     if not calendar_mcp_url or not user_id:
-        print(f"{user_interface.Fore.RED}Calendar configuration missing. Cannot create event.{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}Calendar configuration missing. Cannot create event.{_RESET}")
         return False
 
-    print(f"\n{user_interface.Style.DIM}Assistant is parsing details for new event based on: '{llm_suggestion_text}'...{user_interface.Style.RESET_ALL}")
+    print(f"\n{_DIM}Assistant is parsing details for new event based on: '{llm_suggestion_text}'...{_RESET}")
+    prewarm_session(calendar_mcp_url, user_id, CALENDAR_APP_NAME) # Connects (if needed) while Gemini parses
 
-    current_event_creation_details = await llm_processor.parse_event_creation_details_from_suggestion(
-        gemini_client, MODEL_NAME,
+    current_event_creation_details = await _parse_event_creation_cached(
+        gemini_client,
         llm_suggestion_text=llm_suggestion_text,
         original_context_text=original_context_text,
         user_persona=user_persona,
@@ -935,7 +1296,7 @@ async def handle_create_calendar_event(
 
     if not current_event_creation_details or current_event_creation_details.get("error"):
         error_msg = current_event_creation_details.get("error", "Failed to parse event creation details.") if current_event_creation_details else "LLM parsing returned None."
-        print(f"{user_interface.Fore.RED}Could not proceed: {error_msg}{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}Could not proceed: {error_msg}{_RESET}")
         return False
 
     while True:
@@ -944,86 +1305,49 @@ async def handle_create_calendar_event(
         )
 
         if not final_event_details_for_api_or_trigger:
-            print(f"{user_interface.Fore.YELLOW}Event creation cancelled by user.{user_interface.Style.RESET_ALL}")
+            print(f"{_YELLOW}Event creation cancelled by user.{_RESET}")
             return True
 
         if isinstance(final_event_details_for_api_or_trigger, dict) and \
            final_event_details_for_api_or_trigger.get("trigger_action") == "find_free_slots":
 
-            print(f"\n{user_interface.Style.DIM}Finding free slots for the new event...{user_interface.Style.RESET_ALL}")
-            date_str = user_interface.get_user_input("Enter date (YYYY-MM-DD, 'today', 'tomorrow')", default="today")
-            duration_str = user_interface.get_user_input("Desired duration (e.g., 30m, 1h)",
-                default=f"{current_event_creation_details.get('event_duration_hour',0)}h{current_event_creation_details.get('event_duration_minutes',30)}m")
-
-            meeting_duration_minutes = 30
-            try:
-                if 'h' in duration_str:
-                    _h_part = duration_str.split('h')[0]
-                    _m_part = duration_str.split('h')[1].replace('m','') if len(duration_str.split('h')) > 1 else '0'
-                    meeting_duration_minutes = (int(_h_part) * 60) + (int(_m_part) if _m_part else 0)
-                elif 'm' in duration_str: meeting_duration_minutes = int(duration_str.replace('m',''))
-            except ValueError: meeting_duration_minutes = 30
-
-            target_date = None; now_ist = datetime.now(calendar_utils.IST)
-            if date_str.lower() == "today": target_date = now_ist.date()
-            elif date_str.lower() == "tomorrow": target_date = (now_ist + timedelta(days=1)).date()
-            else:
-                try: target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                except ValueError: print(f"{user_interface.Fore.RED}Invalid date format.{user_interface.Style.RESET_ALL}"); continue
-
-            if target_date:
-                time_min_dt = datetime(target_date.year, target_date.month, target_date.day, 9,0,0, tzinfo=calendar_utils.IST)
-                time_max_dt = datetime(target_date.year, target_date.month, target_date.day, 18,0,0, tzinfo=calendar_utils.IST)
-                time_min_iso = calendar_utils.format_datetime_to_iso_ist(time_min_dt)
-                time_max_iso = calendar_utils.format_datetime_to_iso_ist(time_max_dt)
-                work_start_h = user_config.get(config_manager.WORK_START_HOUR_KEY, 9) # Default 9
-                work_end_h = user_config.get(config_manager.WORK_END_HOUR_KEY, 18)   # Default 18
-                parsed_target_date_str = target_date.strftime("%Y-%m-%d")
-
-                print(f"{user_interface.Style.DIM}Establishing session to find free slots...{user_interface.Style.RESET_ALL}")
-                async with McpSessionManager(calendar_mcp_url, user_id, "googlecalendar-findslots-for-create") as slot_finder_manager:
-                    if slot_finder_manager.session:
-                        free_slots_result = await slot_finder_manager.get_calendar_free_slots(
-                            time_min_iso_ist=time_min_iso, # Corrected from just time_min_iso
-                            time_max_iso_ist=time_max_iso, # Corrected from just time_max_iso
-                            meeting_duration_minutes=meeting_duration_minutes,
-                            user_work_start_hour=work_start_h,
-                            user_work_end_hour=work_end_h
-                        )
-                        if free_slots_result.get("successful"):
-                            slots_found = free_slots_result.get("free_slots", [])
-                            user_interface.display_free_slots(slots_found, parsed_target_date_str)
-                            if slots_found and user_interface.get_yes_no_input("Use one of these slots for the event?", default_yes=False):
-                                slot_choice_str = user_interface.get_user_input(f"Enter slot number (1-{len(slots_found)}) or 'n'")
-                                if slot_choice_str.isdigit():
-                                    slot_idx = int(slot_choice_str) - 1
-                                    if 0 <= slot_idx < len(slots_found):
-                                        chosen_slot_start_iso = slots_found[slot_idx]['start']
-                                        dt_obj = calendar_utils.parse_iso_to_ist(chosen_slot_start_iso)
-                                        if dt_obj:
-                                            current_event_creation_details["start_datetime"] = dt_obj.strftime("%Y-%m-%dT%H:%M:%S")
-                                            current_event_creation_details["timezone"] = "Asia/Kolkata"
-                                            current_event_creation_details["event_duration_hour"] = meeting_duration_minutes // 60
-                                            current_event_creation_details["event_duration_minutes"] = meeting_duration_minutes % 60
-                                            print(f"{user_interface.Fore.GREEN}Event time updated from slot.{user_interface.Style.RESET_ALL}")
-                        else: print(f"{user_interface.Fore.RED}Error finding slots: {free_slots_result.get('error')}{user_interface.Style.RESET_ALL}")
-                    else: print(f"{user_interface.Fore.RED}Could not connect to find slots.{user_interface.Style.RESET_ALL}")
+            print(f"\n{_DIM}Finding free slots for the new event...{_RESET}")
+            default_duration_str = f"{current_event_creation_details.get('event_duration_hour',0)}h{current_event_creation_details.get('event_duration_minutes',30)}m"
+            slots_lookup = await _find_free_slots_interactive(user_ctx, default_duration_str)
+            if slots_lookup:
+                slots_found, meeting_duration_minutes = slots_lookup
+                if slots_found and user_interface.get_yes_no_input("Use one of these slots for the event?", default_yes=False):
+                    slot_choice_str = user_interface.get_user_input(f"Enter slot number (1-{len(slots_found)}) or 'n'")
+                    if slot_choice_str.isdigit():
+                        slot_idx = int(slot_choice_str) - 1
+                        if 0 <= slot_idx < len(slots_found):
+                            chosen_slot_start_iso = slots_found[slot_idx]['start']
+                            dt_obj = calendar_utils.parse_iso_to_ist(chosen_slot_start_iso)
+                            if dt_obj:
+                                current_event_creation_details["start_datetime"] = dt_obj.strftime("%Y-%m-%dT%H:%M:%S")
+                                current_event_creation_details["timezone"] = "Asia/Kolkata"
+                                current_event_creation_details["event_duration_hour"] = meeting_duration_minutes // 60
+                                current_event_creation_details["event_duration_minutes"] = meeting_duration_minutes % 60
+                                print(f"{_GREEN}Event time updated from slot.{_RESET}")
             continue # Go back to UI menu with potentially updated current_event_creation_details
 
         final_event_details_for_api = final_event_details_for_api_or_trigger # This is when user chose 's'
 
-        print(f"{user_interface.Style.DIM}Establishing session to create calendar event...{user_interface.Style.RESET_ALL}")
-        async with McpSessionManager(calendar_mcp_url, user_id, "googlecalendar-action-create-EXECUTE") as exec_cal_manager:
-            if not exec_cal_manager.session:
-                print(f"{user_interface.Fore.RED}Failed to establish session for event creation.{user_interface.Style.RESET_ALL}")
-                return False
+        print(f"{_DIM}Establishing session to create calendar event...{_RESET}")
+        exec_cal_manager = await get_session(calendar_mcp_url, user_id, CALENDAR_APP_NAME)
+        if not exec_cal_manager.session:
+            print(f"{_RED}Failed to establish session for event creation.{_RESET}")
+            return False
 
-            create_outcome = await exec_cal_manager.create_calendar_event(event_details=final_event_details_for_api)
+        create_outcome = await exec_cal_manager.create_calendar_event(event_details=final_event_details_for_api)
 
         if create_outcome.get("successful"):
+            _free_slots_cache.clear() # The calendar changed, so cached free slots may be wrong
             # ... (success message)
             return True
         else:
+            if create_outcome.get("outcome_unknown"): # Timed out; the event may still have been created
+                _free_slots_cache.clear()
             # ... (error message)
             return False
 
@@ -1037,21 +1361,21 @@ def display_welcome_art():
         if ascii_file_path.exists():
             with open(ascii_file_path, 'r', encoding='utf-8') as f:
                 art = f.read()
-                print(f"{user_interface.Fore.BLUE}{art}{user_interface.Style.RESET_ALL}")
+                print(f"{_BLUE}{art}{_RESET}")
                 # Add a little welcome message below the art
-                print(f"{user_interface.Style.BRIGHT}MCliPPy - Your Proactive MCP Assistant{user_interface.Style.RESET_ALL}")
+                print(f"{_BRIGHT}MCliPPy - Your Proactive MCP Assistant{_RESET}")
                 print("-" * 60) # A separator line
         else:
-            print(f"{user_interface.Style.BRIGHT}MCliPPy - Proactive MCP Assistant{user_interface.Style.RESET_ALL}") # Fallback if no art
+            print(f"{_BRIGHT}MCliPPy - Proactive MCP Assistant{_RESET}") # Fallback if no art
             print("-" * 60)
     except Exception as e:
         print(f"Could not display welcome art: {e}")
-        print(f"{user_interface.Style.BRIGHT}MCliPPy - Proactive MCP Assistant{user_interface.Style.RESET_ALL}") # Fallback
+        print(f"{_BRIGHT}MCliPPy - Proactive MCP Assistant{_RESET}") # Fallback
         print("-" * 60)
 # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
 
 
-async def main_assistant_entry(run_mode: str = "normal"):
+async def main_assistant_entry(run_mode: str = "normal", refresh: bool = False):
     """Entry point for the assistant logic."""
 
     # +++++++++++++ CALL WELCOME ART DISPLAY (if interactive) +++++++++++++
@@ -1069,37 +1393,25 @@ async def main_assistant_entry(run_mode: str = "normal"):
     user_configuration = config_manager.load_user_config()
 
     if not user_configuration or not user_configuration.get(config_manager.USER_EMAIL_KEY):
-        if sys.stdin.isatty(): # Check if running in an interactive terminal
+        env_signup_answers = _signup_answers_from_env() # Read once; it prints a warning for an invalid email
+        if sys.stdin.isatty() or env_signup_answers: # Interactive terminal, or answers supplied via env
             print("Running first-time setup for assistant...")
-            user_configuration = run_signup_flow()
+            user_configuration = run_signup_flow(env_signup_answers)
             if not (user_configuration and user_configuration.get(config_manager.USER_EMAIL_KEY)):
-                print(f"{user_interface.Fore.RED}Signup incomplete. Exiting.{user_interface.Style.RESET_ALL}")
+                print(f"{_RED}Signup incomplete. Exiting.{_RESET}")
                 return 1 # Error exit code
-            user_configuration = config_manager.load_user_config() # Reload to be sure
+            # run_signup_flow returns the config it just saved, so there is nothing to reload
         else:
             # Running non-interactively (e.g., by launchd) AND not configured
             print("ASSISTANT_ERROR: Not configured and not in an interactive terminal for setup. Please run manually once to configure.")
             return 1 # Error exit code
 
     # --- This part is fine if user_configuration is loaded ---
+    user_ctx = config_manager.UserContext.from_config(user_configuration) # Static for the whole run
     if sys.stdin.isatty(): # Only print welcome back if interactive
-        print(f"\n{user_interface.Fore.GREEN}Welcome back, {user_configuration.get(config_manager.USER_EMAIL_KEY)}!{user_interface.Style.RESET_ALL}")
-    print(f"{user_interface.Style.DIM}Proactive Assistant Cycle Starting at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}...{user_interface.Style.RESET_ALL}")
+        print(f"\n{_GREEN}Welcome back, {user_ctx.user_id}!{_RESET}")
+    print(f"{_DIM}Proactive Assistant Cycle Starting at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}...{_RESET}")
 
-    google_api_key = config_manager.DEV_CONFIG.get(config_manager.ENV_GOOGLE_API_KEY)
-    try:
-        gemini_client = genai.Client(api_key=google_api_key)
-        # Optional: A simple test call to ensure client is working, e.g., listing models
-        # models_list = list(gemini_client.list_models())
-        # if not any(MODEL_NAME in m.name for m in models_list):
-        #     print(f"{user_interface.Fore.RED}Model {MODEL_NAME} not found. Available models: {[m.name for m in models_list]}{user_interface.Style.RESET_ALL}")
-        #     # Potentially exit if primary model isn't available
-        if sys.stdin.isatty():
-            print(f"{user_interface.Fore.GREEN}Gemini client initialized successfully for model {MODEL_NAME}.{user_interface.Style.RESET_ALL}")
-    except Exception as e:
-        print(f"{user_interface.Fore.RED}Failed to initialize Gemini client: {e}{user_interface.Style.RESET_ALL}")
-        traceback.print_exc()
-        return 1
 # outer action loop removed
 
     # --- ACTIVE DAY/HOUR CHECK FOR LAUNCHD ---
@@ -1111,9 +1423,25 @@ async def main_assistant_entry(run_mode: str = "normal"):
     now_ist = datetime.now(calendar_utils.IST) # Use IST
     if not (now_ist.weekday() in active_days and \
             active_start_hour <= now_ist.hour < active_end_hour):
-        print(f"{user_interface.Style.DIM}Current time {now_ist.strftime('%A %H:%M')} is outside active schedule ({active_days}, {active_start_hour}:00-{active_end_hour}:00). Skipping checks.{user_interface.Style.RESET_ALL}")
+        print(f"{_DIM}Current time {now_ist.strftime('%A %H:%M')} is outside active schedule ({active_days}, {active_start_hour}:00-{active_end_hour}:00). Skipping checks.{_RESET}")
         return 0 # Normal exit, just not active time
 
+    # Created only once the run is known to do work; off-schedule launchd runs never load the SDK
+    try:
+        gemini_client = get_gemini_client()
+        # Optional: A simple test call to ensure client is working, e.g., listing models
+        # models_list = list(gemini_client.list_models())
+        # if not any(MODEL_NAME in m.name for m in models_list):
+        #     print(f"{_RED}Model {MODEL_NAME} not found. Available models: {[m.name for m in models_list]}{_RESET}")
+        #     # Potentially exit if primary model isn't available
+        if sys.stdin.isatty():
+            print(f"{_GREEN}Gemini client initialized successfully for model {MODEL_NAME}.{_RESET}")
+    except Exception as e:
+        print(f"{_RED}Failed to initialize Gemini client: {e}{_RESET}")
+        import traceback # Only needed on this error path
+        traceback.print_exc()
+        return 1
+
     actionable_emails_list = []
     actionable_events_list = []
     can_proceed_to_interaction = False
@@ -1124,7 +1452,7 @@ async def main_assistant_entry(run_mode: str = "normal"):
     can_proceed_to_interaction = False
 
     if run_mode == "from_notification":
-        print(f"{user_interface.Style.DIM}Loading data from last notification check...{user_interface.Style.RESET_ALL}")
+        print(f"{_DIM}Loading data from last notification check...{_RESET}")
         loaded_data = config_manager.load_actionable_data() # Uses default max_age
         if loaded_data:
             actionable_emails_list = loaded_data.get("emails", [])
@@ -1133,22 +1461,31 @@ async def main_assistant_entry(run_mode: str = "normal"):
              # Clear the data after loading so it's not re-used if user quits and re-runs manually
             config_manager.clear_actionable_data()
         else:
-            print(f"{user_interface.Fore.YELLOW}Could not load recent actionable data. Performing a fresh check...{user_interface.Style.RESET_ALL}")
+            print(f"{_YELLOW}Could not load recent actionable data. Performing a fresh check...{_RESET}")
             # Fall through to normal check
             # No active day/hour check here, as user explicitly clicked notification
 
+    elif run_mode == "normal" and not refresh and sys.stdin.isatty():
+        # A manual re-run moments after a check reuses that check's results instead of refetching everything
+        recent_data = config_manager.load_actionable_data(max_age_seconds=PROACTIVE_SNAPSHOT_TTL_S, report_stale=False) # Usually stale; not worth a message
+        if recent_data:
+            print(f"{_DIM}Using results from a check in the last {PROACTIVE_SNAPSHOT_TTL_S}s (run with --refresh to check again).{_RESET}")
+            actionable_emails_list = recent_data.get("emails", [])
+            actionable_events_list = recent_data.get("events", [])
+            can_proceed_to_interaction = True
+
     if not can_proceed_to_interaction: # Normal run or fallback from failed load
         # Active day/hour check for non-notification triggered runs (e.g. launchd direct call)
         if run_mode == "normal" and not (now_ist.weekday() in active_days and active_start_hour <= now_ist.hour < active_end_hour):
-            print(f"{user_interface.Style.DIM}Current time {now_ist.strftime('%A %H:%M')} is outside active schedule. Skipping checks.{user_interface.Style.RESET_ALL}")
+            print(f"{_DIM}Current time {now_ist.strftime('%A %H:%M')} is outside active schedule. Skipping checks.{_RESET}")
             return 0
             # No active day/hour check here, as user explicitly clicked notification
 
         continue_after_checks, emails_from_check, events_from_check = await perform_proactive_checks(
-                    user_configuration, gemini_client, MODEL_NAME
+                    user_configuration, gemini_client, MODEL_NAME, user_ctx
                 )
         if not continue_after_checks: # Auth needed
-            print(f"{user_interface.Fore.YELLOW}Cycle paused: user action (e.g., auth) required. Exiting this run.{user_interface.Style.RESET_ALL}")
+            print(f"{_YELLOW}Cycle paused: user action (e.g., auth) required. Exiting this run.{_RESET}")
             return 0
         actionable_emails_list = emails_from_check
         actionable_events_list = events_from_check
@@ -1158,7 +1495,7 @@ async def main_assistant_entry(run_mode: str = "normal"):
 
     if sys.stdin.isatty() and can_proceed_to_interaction:
         if not actionable_emails_list and not actionable_events_list: # Check if lists are truly empty
-            print(f"\n{user_interface.Fore.GREEN}No actionable items found to interact with.{user_interface.Style.RESET_ALL}")
+            print(f"\n{_GREEN}No actionable items found to interact with.{_RESET}")
         else:
             first_display_of_items = True
             while True:
@@ -1171,10 +1508,10 @@ async def main_assistant_entry(run_mode: str = "normal"):
                 first_display_of_items = False
                 if not action_choice_data:
                     if not actionable_emails_list and not actionable_events_list: break
-                    else: print(f"{user_interface.Fore.YELLOW}Try selection again or 'd', 'r', 'q'.{user_interface.Style.RESET_ALL}"); continue
+                    else: print(f"{_YELLOW}Try selection again or 'd', 'r', 'q'.{_RESET}"); continue
                 action_type, item_idx, action_idx_in_llm_suggestions, raw_choice = action_choice_data
-                if action_type == "done": print(f"{user_interface.Fore.YELLOW}Done with actions.{user_interface.Style.RESET_ALL}"); break
-                elif action_type == "quit_assistant": print(f"{user_interface.Fore.YELLOW}Quitting.{user_interface.Style.RESET_ALL}"); return 0
+                if action_type == "done": print(f"{_YELLOW}Done with actions.{_RESET}"); break
+                elif action_type == "quit_assistant": print(f"{_YELLOW}Quitting.{_RESET}"); return 0
                 elif action_type == "redisplay": first_display_of_items = True; continue
                 elif action_type == "chat_with_assistant": await redirect_to_chat()
                 action_succeeded_this_turn = False
@@ -1184,28 +1521,19 @@ async def main_assistant_entry(run_mode: str = "normal"):
                     chosen_email_data = actionable_emails_list[item_idx]
                     chosen_llm_action_text = chosen_email_data['suggested_actions'][action_idx_in_llm_suggestions]
                     user_interface.print_header(f"Action on Email: {chosen_email_data['original_email_data'].get('subject', 'N/A')[:40]}...")
-                    print(f"{user_interface.Style.BRIGHT}Chosen LLM Suggested Action: {user_interface.Fore.GREEN}{chosen_llm_action_text}{user_interface.Style.RESET_ALL}")
+                    print(f"{_BRIGHT}Chosen LLM Suggested Action: {_GREEN}{chosen_llm_action_text}{_RESET}")
 
                     # --- MODIFICATION FOR EMAIL ACTIONS ---
-                    if "draft" in chosen_llm_action_text.lower() or \
-                        "reply" in chosen_llm_action_text.lower() or \
-                        "availability" in chosen_llm_action_text.lower() or \
-                        "times" in chosen_llm_action_text.lower() or \
-                        "slots" in chosen_llm_action_text.lower() or \
-                        "propose" in chosen_llm_action_text.lower() or \
-                        "suggest" in chosen_llm_action_text.lower():
+                    if _EMAIL_REPLY_RE.search(chosen_llm_action_text):
 
                         action_succeeded_this_turn = await handle_draft_email_reply(
                             gemini_client, MODEL_NAME,
                             chosen_email_data,
                             chosen_llm_action_text,
-                            user_configuration
+                            user_ctx
                             # No McpSessionManager passed here
                         )
-                    elif "create calendar event" in chosen_llm_action_text.lower() or \
-                            "schedule a meeting" in chosen_llm_action_text.lower() or \
-                            "schedule a meeting" in chosen_llm_action_text.lower() or \
-                            "add to calendar" in chosen_llm_action_text.lower():
+                    elif _EMAIL_CREATE_EVENT_RE.search(chosen_llm_action_text):
 
                         original_email_body_for_context = chosen_email_data.get("original_email_data", {}).get("messageText") or \
                                                             chosen_email_data.get("original_email_data", {}).get("snippet","No original email body available for context.")
@@ -1213,11 +1541,11 @@ async def main_assistant_entry(run_mode: str = "normal"):
                             gemini_client, MODEL_NAME,
                             chosen_llm_action_text,
                             original_email_body_for_context,
-                            user_configuration
+                            user_ctx
                             # No McpSessionManager passed here
                         )
                     else:
-                        print(f"{user_interface.Fore.MAGENTA}Action '{chosen_llm_action_text}' for email is not yet specifically implemented.{user_interface.Style.RESET_ALL}")
+                        print(f"{_MAGENTA}Action '{chosen_llm_action_text}' for email is not yet specifically implemented.{_RESET}")
 
                     pass
 
@@ -1227,48 +1555,43 @@ async def main_assistant_entry(run_mode: str = "normal"):
                         chosen_llm_action_text = chosen_event_data['suggested_actions'][action_idx_in_llm_suggestions]
                         original_event_summary_for_context = chosen_event_data.get("original_event_data", {}).get("summary", "related event")
                         user_interface.print_header(f"Action on Event: {original_event_summary_for_context[:40]}...")
-                        print(f"{user_interface.Style.BRIGHT}Chosen LLM Suggested Action: {user_interface.Fore.GREEN}{chosen_llm_action_text}{user_interface.Style.RESET_ALL}")
+                        print(f"{_BRIGHT}Chosen LLM Suggested Action: {_GREEN}{chosen_llm_action_text}{_RESET}")
 
                         # --- MODIFICATION FOR CALENDAR ACTIONS ---
-                        if "update" in chosen_llm_action_text.lower() or \
-                            "reschedule" in chosen_llm_action_text.lower() or \
-                            "change title" in chosen_llm_action_text.lower() or \
-                            "add attendee" in chosen_llm_action_text.lower() or \
-                            "add google meet" in chosen_llm_action_text.lower():
+                        if _CALENDAR_UPDATE_RE.search(chosen_llm_action_text):
 
                             action_succeeded_this_turn = await handle_update_calendar_event(
                                 chosen_event_data,
-                                user_configuration
+                                user_ctx
                                 # No McpSessionManager passed here
                             )
-                        elif "delete" in chosen_llm_action_text.lower() or "cancel this meeting" in chosen_llm_action_text.lower():
+                        elif _CALENDAR_DELETE_RE.search(chosen_llm_action_text):
                             action_succeeded_this_turn = await handle_delete_calendar_event(
                                 chosen_event_data,
-                                user_configuration
+                                user_ctx
                                 # No McpSessionManager passed here
                             )
-                        elif "create a new event" in chosen_llm_action_text.lower() or \
-                                "schedule a follow-up" in chosen_llm_action_text.lower() or \
-                                "schedule a prep session" in chosen_llm_action_text.lower() or \
-                                "block additional time" in chosen_llm_action_text.lower():
+                        elif _CALENDAR_CREATE_RE.search(chosen_llm_action_text):
 
                             action_succeeded_this_turn = await handle_create_calendar_event(
                                 gemini_client, MODEL_NAME,
                                 chosen_llm_action_text,
                                 original_event_summary_for_context,
-                                user_configuration
+                                user_ctx
                                 # No McpSessionManager passed here
                             )
                         else:
-                            print(f"{user_interface.Fore.MAGENTA}Action '{chosen_llm_action_text}' for event (ID: {chosen_event_data.get('original_event_data', {}).get('id')}) is not yet implemented.{user_interface.Style.RESET_ALL}")
+                            print(f"{_MAGENTA}Action '{chosen_llm_action_text}' for event (ID: {chosen_event_data.get('original_event_data', {}).get('id')}) is not yet implemented.{_RESET}")
                     else:
-                        print(f"{user_interface.Fore.RED}Internal error: Invalid event index selected ({item_idx}).{user_interface.Style.RESET_ALL}")
+                        print(f"{_RED}Internal error: Invalid event index selected ({item_idx}).{_RESET}")
 
                     pass
 
-                if action_succeeded_this_turn: print(f"{user_interface.Fore.GREEN}Action '{raw_choice}' processed.{user_interface.Style.RESET_ALL}")
-                elif action_type in ["email", "event"]: print(f"{user_interface.Fore.YELLOW}Action '{raw_choice}' not completed.{user_interface.Style.RESET_ALL}")
-            print(f"\n{user_interface.Style.DIM}Finished interacting.{user_interface.Style.RESET_ALL}")
+                if action_succeeded_this_turn:
+                    print(f"{_GREEN}Action '{raw_choice}' processed.{_RESET}")
+                    config_manager.clear_actionable_data() # A quick re-run must not offer the item that was just handled
+                elif action_type in ["email", "event"]: print(f"{_YELLOW}Action '{raw_choice}' not completed.{_RESET}")
+            print(f"\n{_DIM}Finished interacting.{_RESET}")
 
     elif not sys.stdin.isatty() and can_proceed_to_interaction: # Non-interactive run (launchd) that had data
         print("Non-interactive run: Proactive checks resulted in actionable items. Notifications sent if applicable.")
@@ -1276,9 +1599,16 @@ async def main_assistant_entry(run_mode: str = "normal"):
         print("Non-interactive run: No new actionable items or cycle paused due to pending user action.")
 
 
-    print(f"\n{user_interface.Style.DIM}Proactive Assistant Cycle Finished at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}.{user_interface.Style.RESET_ALL}")
+    print(f"\n{_DIM}Proactive Assistant Cycle Finished at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}.{_RESET}")
     return 0
 
+async def run_assistant(run_mode: str = "normal", refresh: bool = False):
+    """Runs main_assistant_entry and closes pooled MCP sessions however it exits."""
+    try:
+        return await main_assistant_entry(run_mode=run_mode, refresh=refresh)
+    finally:
+        await close_all_sessions()
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Proactive Assistant")
     parser.add_argument(
@@ -1286,21 +1616,35 @@ if __name__ == "__main__":
         action="store_true",
         help="Indicates the script is run from a notification action."
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Always run a fresh proactive check, even if one completed moments ago."
+    )
     args = parser.parse_args()
 
+    # Plain message format keeps log lines consistent with the assistant's printed output
+    log_level_name = (config_manager.DEV_CONFIG.get(config_manager.ENV_ASSISTANT_LOG) or "INFO").upper()
+    log_level = getattr(logging, log_level_name, None)
+    logging.basicConfig(level=log_level if isinstance(log_level, int) else logging.INFO, format="%(message)s", stream=sys.stdout)
+
     current_run_mode = "from_notification" if args.from_notification else "normal"
 
     try:
-        exit_code = asyncio.run(main_assistant_entry(run_mode=current_run_mode)) # Pass run_mode
+        exit_code = asyncio.run(
+            run_assistant(run_mode=current_run_mode, refresh=args.refresh), # Pass run_mode
+            loop_factory=uvloop.new_event_loop if uvloop else None
+        )
         sys.exit(exit_code if isinstance(exit_code, int) else 0)
     except KeyboardInterrupt:
-        print(f"\n{user_interface.Fore.YELLOW}Assistant stopped by user. Goodbye!{user_interface.Style.RESET_ALL}")
+        print(f"\n{_YELLOW}Assistant stopped by user. Goodbye!{_RESET}")
         sys.exit(0)
     except SystemExit as e: # Catch explicit sys.exit calls
         # If sys.exit was called with an int (like sys.exit(1)), use that.
         # Otherwise, if it was a plain sys.exit() (code is None), default to 0.
         sys.exit(e.code if isinstance(e.code, int) else 0)
     except Exception as e:
-        print(f"{user_interface.Fore.RED}An unexpected error occurred in the main execution: {e}{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}An unexpected error occurred in the main execution: {e}{_RESET}")
+        import traceback # Only needed on this error path
         traceback.print_exc()
         sys.exit(1) # Error exit for cron/launchd
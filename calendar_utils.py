@@ -1,9 +1,11 @@
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 
 # Assume IST for all operations for now as per your requirement
 IST = timezone(timedelta(hours=5, minutes=30))
 
+@lru_cache(maxsize=512) # Busy-slot and free-slot strings repeat across lookups; datetimes are immutable
 def parse_iso_to_ist(datetime_str: str) -> Optional[datetime]:
     """Parses ISO string (potentially with offset) and returns IST datetime object."""
     try:
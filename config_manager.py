@@ -1,8 +1,10 @@
 # config_manager.py
 import os
 import json
+import hashlib
 from dotenv import load_dotenv # Make sure this is imported
 from pathlib import Path
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional, Dict, List, Any
 
@@ -26,6 +28,14 @@ WORK_END_HOUR_KEY = "WORK_END_HOUR"     # For free slot calculation
 ENV_GOOGLE_API_KEY = "GOOGLE_API_KEY" # Renamed from GEMINI_API_KEY
 ENV_GMAIL_MCP_SERVER_UUID = "GMAIL_MCP_SERVER_UUID"
 ENV_CALENDAR_MCP_SERVER_UUID = "CALENDAR_MCP_SERVER_UUID"
+ENV_GMAIL_PAGE_SIZE = "GMAIL_PAGE_SIZE" # Optional: emails requested per GMAIL_FETCH_EMAILS page
+ENV_MCP_CALL_TIMEOUT_S = "MCP_CALL_TIMEOUT_S" # Optional: seconds before a read-only MCP tool call is abandoned
+ENV_MCP_WRITE_CALL_TIMEOUT_S = "MCP_WRITE_CALL_TIMEOUT_S" # Optional: the same bound for send/create/update/delete tools
+ENV_ASSISTANT_LOG = "ASSISTANT_LOG" # Optional: log level name, e.g. DEBUG for MCP/LLM diagnostics (default INFO)
+# Optional: answers for a non-interactive first run (all three must be set)
+ENV_SIGNUP_EMAIL = "SIGNUP_EMAIL"
+ENV_SIGNUP_PERSONA = "SIGNUP_PERSONA"
+ENV_SIGNUP_PRIORITIES = "SIGNUP_PRIORITIES"
 
 CONFIG_DIR_NAME = ".proactive_assistant"
 USER_CONFIG_FILE_NAME = "user_config.json"
@@ -52,6 +62,13 @@ def load_env_vars():
         ENV_GOOGLE_API_KEY: os.getenv(ENV_GOOGLE_API_KEY), # Use new constant
         ENV_GMAIL_MCP_SERVER_UUID: os.getenv(ENV_GMAIL_MCP_SERVER_UUID),
         ENV_CALENDAR_MCP_SERVER_UUID: os.getenv(ENV_CALENDAR_MCP_SERVER_UUID),
+        ENV_GMAIL_PAGE_SIZE: os.getenv(ENV_GMAIL_PAGE_SIZE),
+        ENV_MCP_CALL_TIMEOUT_S: os.getenv(ENV_MCP_CALL_TIMEOUT_S),
+        ENV_MCP_WRITE_CALL_TIMEOUT_S: os.getenv(ENV_MCP_WRITE_CALL_TIMEOUT_S),
+        ENV_ASSISTANT_LOG: os.getenv(ENV_ASSISTANT_LOG),
+        ENV_SIGNUP_EMAIL: os.getenv(ENV_SIGNUP_EMAIL),
+        ENV_SIGNUP_PERSONA: os.getenv(ENV_SIGNUP_PERSONA),
+        ENV_SIGNUP_PRIORITIES: os.getenv(ENV_SIGNUP_PRIORITIES),
     }
     # For debugging if GOOGLE_API_KEY is correctly loaded into environment:
     # print(f"os.environ['GOOGLE_API_KEY'] after load_dotenv: {os.getenv('GOOGLE_API_KEY')}")
@@ -59,21 +76,78 @@ def load_env_vars():
 
 DEV_CONFIG = load_env_vars() # This runs on module import
 
+def get_dev_config_int(key: str, default: int) -> int:
+    """Reads an optional integer setting from DEV_CONFIG, falling back to default if unset or invalid."""
+    value = DEV_CONFIG.get(key)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        print(f"CONFIG_WARNING: Invalid value '{value}' for {key}. Using default {default}.")
+        return default
+
+def get_dev_config_float(key: str, default: float) -> float:
+    """Reads an optional positive float setting from DEV_CONFIG, falling back to default if unset or invalid."""
+    value = DEV_CONFIG.get(key)
+    if value in (None, ""):
+        return default
+    try:
+        parsed = float(value)
+    except (TypeError, ValueError):
+        parsed = 0.0
+    if parsed <= 0:
+        print(f"CONFIG_WARNING: Invalid value '{value}' for {key}. Using default {default}.")
+        return default
+    return parsed
+
+# --- Per-run User Context ---
+@dataclass(frozen=True, slots=True)
+class UserContext:
+    """Identity, MCP URLs and working hours read once from user_config.json; these don't change while the assistant runs."""
+    user_id: Optional[str]
+    persona: str
+    priorities: str
+    gmail_url: Optional[str]
+    calendar_url: Optional[str]
+    work_start_hour: int = 9
+    work_end_hour: int = 18
+
+    @classmethod
+    def from_config(cls, user_config: Dict[str, Any]) -> "UserContext":
+        return cls(
+            user_id=user_config.get(USER_EMAIL_KEY),
+            persona=user_config.get(USER_PERSONA_KEY, "a busy professional"),
+            priorities=user_config.get(USER_PRIORITIES_KEY, "important tasks and communications"),
+            gmail_url=user_config.get(GMAIL_MCP_URL_KEY),
+            calendar_url=user_config.get(CALENDAR_MCP_URL_KEY),
+            work_start_hour=user_config.get(WORK_START_HOUR_KEY, 9),
+            work_end_hour=user_config.get(WORK_END_HOUR_KEY, 18),
+        )
+
 # --- User Configuration Management ---
 def _ensure_config_dir_exists():
     """Ensures the user-specific configuration directory exists."""
     CONFIG_DIR_PATH.mkdir(parents=True, exist_ok=True)
 
+# The config last read or written by this process; user_config.json is only read again after a failed load
+_cached_user_config: Optional[Dict[str, Any]] = None
+
 def load_user_config():
     """Loads user-specific configuration from user_config.json.
     Returns an empty dict if the file doesn't exist or is invalid.
+    The dict is kept in memory, so later calls return the same object until save_user_config replaces it.
     """
+    global _cached_user_config
+    if _cached_user_config is not None:
+        return _cached_user_config
     _ensure_config_dir_exists()
     if USER_CONFIG_FILE_PATH.exists():
         try:
             with open(USER_CONFIG_FILE_PATH, 'r') as f:
                 # print(f"Loading user config from: {USER_CONFIG_FILE_PATH}")
-                return json.load(f)
+                _cached_user_config = json.load(f)
+                return _cached_user_config
         except json.JSONDecodeError:
             print(f"Error: Could not decode {USER_CONFIG_FILE_NAME}. Starting with fresh config.")
             return {}
@@ -84,14 +158,17 @@ def load_user_config():
 
 def save_user_config(config_data):
     """Saves user-specific configuration to user_config.json."""
+    global _cached_user_config
     _ensure_config_dir_exists()
     try:
         with open(USER_CONFIG_FILE_PATH, 'w') as f:
             json.dump(config_data, f, indent=2)
         # print(f"User config saved to: {USER_CONFIG_FILE_PATH}")
+        _cached_user_config = config_data
         return True
     except Exception as e:
         print(f"Error saving user config to {USER_CONFIG_FILE_PATH}: {e}")
+        _cached_user_config = None # The file may be partly written, so re-read it next time
         return False
 
 def get_user_config_value(key, default=None):
@@ -147,10 +224,11 @@ def save_actionable_data(emails_data: List[Dict[str, Any]], events_data: List[Di
         print(f"CONFIG_ERROR: Error saving actionable data: {e}")
         return False
 
-def load_actionable_data(max_age_seconds: int = 300) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+def load_actionable_data(max_age_seconds: int = 300, report_stale: bool = True) -> Optional[Dict[str, List[Dict[str, Any]]]]:
     """
     Loads actionable data if the file exists and is recent enough.
     Returns {"emails": [...], "events": [...]} or None.
+    With report_stale=False a too-old or undated file is ignored without a message.
     """
     if TEMP_ACTIONABLE_DATA_FILE_PATH.exists():
         try:
@@ -163,9 +241,9 @@ def load_actionable_data(max_age_seconds: int = 300) -> Optional[Dict[str, List[
                 if (datetime.now(timezone.utc) - saved_timestamp).total_seconds() <= max_age_seconds:
                     # print(f"DEBUG: Loaded recent actionable data from {TEMP_ACTIONABLE_DATA_FILE_PATH}")
                     return {"emails": data.get("emails", []), "events": data.get("events", [])}
-                else:
+                elif report_stale:
                     print(f"CONFIG_INFO: Stored actionable data is too old (older than {max_age_seconds}s). Ignoring.")
-            else:
+            elif report_stale:
                 print("CONFIG_INFO: Stored actionable data has no timestamp. Ignoring.")
         except Exception as e:
             print(f"CONFIG_ERROR: Error loading actionable data: {e}")
@@ -180,7 +258,70 @@ def clear_actionable_data():
         except Exception as e:
             print(f"CONFIG_ERROR: Error clearing actionable data file: {e}")
 
-DEV_CONFIG = load_env_vars()
+EMAIL_TRIAGE_CACHE_FILE_NAME = "seen_emails.json"
+EMAIL_TRIAGE_CACHE_FILE_PATH = CONFIG_DIR_PATH / EMAIL_TRIAGE_CACHE_FILE_NAME # In ~/.proactive_assistant/
+EMAIL_TRIAGE_CACHE_MAX_AGE_SECONDS = 48 * 3600 # Gmail is queried over 24h, so older verdicts can't be reused
+
+def make_cache_fingerprint(*parts: str) -> str:
+    """Short stable digest of the inputs a cached LLM verdict depends on (e.g. persona and priorities)."""
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+EVENT_ANALYSIS_CACHE_FILE_NAME = "seen_events.json"
+EVENT_ANALYSIS_CACHE_FILE_PATH = CONFIG_DIR_PATH / EVENT_ANALYSIS_CACHE_FILE_NAME # In ~/.proactive_assistant/
+EVENT_ANALYSIS_CACHE_MAX_AGE_SECONDS = 48 * 3600 # Calendar is queried 24h ahead, so older analyses won't be asked for again
+
+def _load_verdict_cache(path: Path, fingerprint: str, max_age_seconds: int, label: str) -> Dict[str, Dict[str, Any]]:
+    """Loads a {key: {..., "ts"}} cache of LLM results, dropping expired entries and caches built for another fingerprint."""
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get("fingerprint") != fingerprint:
+            return {} # Persona/priorities changed since these verdicts were made
+        now = datetime.now(timezone.utc)
+        return {
+            key: entry for key, entry in data.get("verdicts", {}).items()
+            if isinstance(entry, dict) and entry.get("ts") and
+               (now - datetime.fromisoformat(entry["ts"])).total_seconds() <= max_age_seconds
+        }
+    except Exception as e:
+        print(f"CONFIG_ERROR: Error loading {label} cache: {e}. Starting with an empty cache.")
+        return {}
+
+def _save_verdict_cache(path: Path, cache: Dict[str, Dict[str, Any]], fingerprint: str, label: str):
+    """Saves a cache read by _load_verdict_cache."""
+    _ensure_config_dir_exists()
+    try:
+        with open(path, 'w') as f:
+            json.dump({"fingerprint": fingerprint, "verdicts": cache}, f)
+        return True
+    except Exception as e:
+        print(f"CONFIG_ERROR: Error saving {label} cache: {e}")
+        return False
+
+def load_email_triage_cache(fingerprint: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads LLM triage verdicts from earlier cycles, keyed by Gmail messageId.
+    Each value is {"is_important", "summary", "suggested_actions", "ts"}. Expired entries are dropped, and
+    the whole cache is ignored if it was built for a different fingerprint (see make_cache_fingerprint).
+    """
+    return _load_verdict_cache(EMAIL_TRIAGE_CACHE_FILE_PATH, fingerprint, EMAIL_TRIAGE_CACHE_MAX_AGE_SECONDS, "email triage")
+
+def save_email_triage_cache(cache: Dict[str, Dict[str, Any]], fingerprint: str):
+    """Saves the email triage cache (see load_email_triage_cache)."""
+    return _save_verdict_cache(EMAIL_TRIAGE_CACHE_FILE_PATH, cache, fingerprint, "email triage")
+
+def load_event_analysis_cache(fingerprint: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Loads LLM event analyses from earlier cycles, keyed by event id plus its 'updated' timestamp,
+    so an edited event is analyzed again. Each value is {"summary_llm", "suggested_actions", "ts"}.
+    """
+    return _load_verdict_cache(EVENT_ANALYSIS_CACHE_FILE_PATH, fingerprint, EVENT_ANALYSIS_CACHE_MAX_AGE_SECONDS, "event analysis")
+
+def save_event_analysis_cache(cache: Dict[str, Dict[str, Any]], fingerprint: str):
+    """Saves the event analysis cache (see load_event_analysis_cache)."""
+    return _save_verdict_cache(EVENT_ANALYSIS_CACHE_FILE_PATH, cache, fingerprint, "event analysis")
 
 # --- Main for testing this module ---
 if __name__ == "__main__":
@@ -212,6 +353,7 @@ if __name__ == "__main__":
 
 
     print("\n4. Reloading user config to verify save:")
+    _cached_user_config = None # Force a real read from disk
     reloaded_user_cfg = load_user_config()
     print(f"  Reloaded user_config.json content: {json.dumps(reloaded_user_cfg, indent=2)}")
 
@@ -1,5 +1,6 @@
 # llm_processor.py
 import json
+import re
 import traceback
 import asyncio
 import config_manager # For config_manager.USER_EMAIL_KEY
@@ -8,51 +9,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from google import genai # Main SDK
 from google.genai import types # For types like GenerateContentConfig
 
-# --- Email Processing ---
-async def process_emails_with_llm(
-    gemini_client: genai.Client,
-    model_name: str,
-    emails_data: list,
-    user_persona: str,
-    user_priorities: str
-):
-    if not emails_data:
-        return []
-
-    prompt_email_parts = []
-    for i, email in enumerate(emails_data):
-        subject = "No Subject"
-        sender = "Unknown Sender"
-        snippet = email.get("snippet", "No snippet available.")
-        message_text_preview = email.get("messageText", snippet)[:500]
-
-        if email.get("payload") and isinstance(email["payload"].get("headers"), list):
-            for header in email["payload"]["headers"]:
-                if header.get("name", "").lower() == "subject":
-                    subject = header.get("value", "No Subject")
-                if header.get("name", "").lower() == "from":
-                    sender = header.get("value", "Unknown Sender")
-
-        prompt_email_parts.append(
-            f"Email {i+1}:\n"
-            f"ID: {email.get('messageId', 'N/A')}\n"
-            f"From: {sender}\n"
-            f"Subject: {subject}\n"
-            f"Snippet/Preview: {message_text_preview}\n---\n"
-        )
-
-    if not prompt_email_parts:
-        print("LLM_PROCESSOR (Emails): No email content to process.")
-        return []
-    email_details_str = "\n".join(prompt_email_parts)
-
-    system_prompt = f"""
-You are a highly efficient AI assistant for a user whose role is: '{user_persona}'.
-Their key priorities are: '{user_priorities}'.
-
-You will be given a list of recent unread emails. Your tasks are:
-
-Determine if each email is "important".
+# --- Shared prompt pieces (used by the single-purpose and the combined prompts) ---
+EMAIL_TRIAGE_TASKS = """Determine if each email is "important".
 For important emails, provide a concise 1-2 sentence summary.
 For important emails, suggest 1-3 brief, actionable next steps.
 The assistant has tools for:
@@ -69,31 +27,168 @@ If an email discusses changes to an existing meeting (e.g., rescheduling, changi
     1. Try to identify the original meeting by its title or time if mentioned in the email.
     2. Extract the proposed changes (e.g., new time, new attendees, request for a Meet link).
     3. Suggest an action like: "Update event '[Original Event Title Guessed]' with changes: [Details of changes, e.g., start_time to YYYY-MM-DDTHH:MM:SS, add_attendee: x@y.com, create_google_meet: true]".
-    OR if the original event is unclear, suggest: "Follow up on email to clarify which event needs update for [details of changes]".
-
+    OR if the original event is unclear, suggest: "Follow up on email to clarify which event needs update for [details of changes]"."""
 
-Analyze the following emails:
-{email_details_str}
-
-Please format your response as a single JSON array, where each object in the array corresponds to an email you analyzed (important or not).
-Each object should have the following keys:
+EMAIL_RESULT_FIELDS = """Each object should have the following keys:
 - "email_id": (string) The ID of the email (e.g., from "ID: ...").
 - "is_important": (boolean) True if you deem it important, False otherwise.
 - "summary": (string) Your 1-2 sentence summary IF is_important is true, otherwise an empty string or null.
 - "suggested_actions": (array of strings) A list of 1-3 suggested actions IF is_important is true, otherwise an empty array or null.
 
 Example of a single object in the JSON array:
-{{
+{
 "email_id": "xyz789",
 "is_important": true,
 "summary": "John wants to move the 'Project Alpha Sync' from 2 PM to 4 PM today.",
 "suggested_actions": ["Draft reply to John acknowledging request", "Update event 'Project Alpha Sync' start_datetime to today 4 PM", "Check calendar for conflicts at 4 PM"]
-}}
+}
+
+Only include emails in your response that you have analyzed. If an email is not important, still include its object with "is_important": false."""
+
+CALENDAR_EVENT_TASKS = """1. For EACH event, provide a very brief highlight or summary.
+2. For EACH event, suggest 1-3 brief, actionable next steps using calendar tools.
+   The assistant has tools to:
+     - Delete an event (e.g., "Cancel this meeting")
+     - Update an event's details (e.g., title, time, description, attendees, add Google Meet) -> Suggest as "Update this event's details"
+     - Create a new event
+     - Find free time slots
+
+   Focus on concrete actions related to managing the calendar event itself or follow-ups.
+   Example suggestions: "Delete this event", "Update this event's details", "Schedule a 30-min follow-up"."""
+
+CALENDAR_RESULT_FIELDS = """Each object in the array MUST correspond to an event you analyzed and MUST have the following keys:
+- "event_id": (string) The ID of the event (e.g., from "Event 1 (ID: ...)").
+- "summary_llm": (string) Your brief highlight/summary for this event.
+- "suggested_actions": (array of strings) A list of 1-3 suggested actions for this event. If no specific actions are obvious, provide an empty array or a generic suggestion like "Review event details"."""
 
-Only include emails in your response that you have analyzed. If an email is not important, still include its object with "is_important": false.
+def _parse_llm_json(response_text: str) -> Any:
+    """Strips an optional ```json fence from a Gemini response and decodes it."""
+    cleaned_response_text = response_text.strip()
+    if cleaned_response_text.startswith("```json"):
+        cleaned_response_text = cleaned_response_text[7:]
+    if cleaned_response_text.endswith("```"):
+        cleaned_response_text = cleaned_response_text[:-3]
+    return json.loads(cleaned_response_text)
+
+# --- Email Processing ---
+def _headers_by_name(payload: Optional[Dict[str, Any]]) -> Dict[str, str]:
+    """Builds a lowercase header-name -> value map in one pass over a Gmail payload's headers."""
+    if not payload or not isinstance(payload.get("headers"), list):
+        return {}
+    return {header.get("name", "").lower(): header.get("value") for header in payload["headers"]}
+
+EMAIL_PREVIEW_CHARS = 500 # Body preview sent to the LLM per email
+
+# Automated senders whose mail is never worth an LLM triage call
+LOW_SIGNAL_SENDER_RE = re.compile(r"(noreply|no-reply|notifications|alerts|newsletter|mailer-daemon)@", re.IGNORECASE)
+
+def is_low_signal_sender(email: Dict[str, Any]) -> bool:
+    """True if the raw Gmail message comes from an automated address (see LOW_SIGNAL_SENDER_RE)."""
+    sender = email.get("sender") or _headers_by_name(email.get("payload")).get("from") or ""
+    return LOW_SIGNAL_SENDER_RE.search(sender) is not None
+
+def _slim_email_for_prompt(email: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Reduces a raw GMAIL_FETCH_EMAILS message (fetched with its full payload) to the few fields
+    the triage prompt uses. The raw message itself is kept by the caller for display and replies.
+    """
+    # Composio already exposes sender/subject at the top level; only walk headers if they're missing
+    sender = email.get("sender")
+    subject = email.get("subject")
+    if not sender or not subject:
+        headers = _headers_by_name(email.get("payload"))
+        sender = sender or headers.get("from")
+        subject = subject or headers.get("subject")
+
+    # Collapse the whitespace runs typical of plain-text bodies so the preview carries more content per token
+    preview_source = email.get("messageText") or email.get("snippet") or "No snippet available."
+    preview = " ".join(preview_source[:EMAIL_PREVIEW_CHARS * 2].split())[:EMAIL_PREVIEW_CHARS]
+
+    return {
+        "id": email.get("messageId", "N/A"),
+        "sender": sender or "Unknown Sender",
+        "subject": subject or "No Subject",
+        "preview": preview,
+    }
+
+def _build_email_details_str(emails_data: list) -> str:
+    """Formats the emails section of a triage prompt."""
+    prompt_email_parts = []
+    for i, email in enumerate(emails_data):
+        slim_email = _slim_email_for_prompt(email)
+        prompt_email_parts.append(
+            f"Email {i+1}:\n"
+            f"ID: {slim_email['id']}\n"
+            f"From: {slim_email['sender']}\n"
+            f"Subject: {slim_email['subject']}\n"
+            f"Snippet/Preview: {slim_email['preview']}\n---\n"
+        )
+    return "\n".join(prompt_email_parts)
+
+def _email_results_with_note(emails_data: list, note: str) -> List[Dict[str, Any]]:
+    """Marks every email as not important with the given note, used when the LLM output is unusable."""
+    return [{"original_email_data": original_email_data, "is_important": False, "summary": note, "suggested_actions": [], "analysis_missing": True}
+            for original_email_data in emails_data]
+
+def _map_email_results(emails_data: list, llm_output: Any) -> List[Dict[str, Any]]:
+    """Joins the LLM's per-email analysis back onto the original email data (by messageId)."""
+    if not isinstance(llm_output, list):
+        print(f"LLM_PROCESSOR (Emails): Gemini response was not a list as expected: {type(llm_output)}")
+        return _email_results_with_note(emails_data, "LLM response format error.")
+
+    processed_emails = []
+    llm_output_map = {item.get("email_id"): item for item in llm_output if isinstance(item, dict)}
+    for original_email_data in emails_data:
+        original_id = original_email_data.get('messageId')
+        processed_item = llm_output_map.get(original_id)
+        if processed_item:
+            processed_emails.append({
+                "original_email_data": original_email_data,
+                "is_important": processed_item.get("is_important", False),
+                "summary": processed_item.get("summary"),
+                "suggested_actions": processed_item.get("suggested_actions", [])
+            })
+        else:
+             processed_emails.append({
+                "original_email_data": original_email_data,
+                "is_important": False,
+                "summary": f"LLM did not provide specific analysis for email ID: {original_id}.",
+                "suggested_actions": [],
+                "analysis_missing": True # Not a real verdict, so it must not be cached
+            })
+    return processed_emails
+
+async def process_emails_with_llm(
+    gemini_client: genai.Client,
+    model_name: str,
+    emails_data: list,
+    user_persona: str,
+    user_priorities: str
+):
+    if not emails_data:
+        return []
+
+    email_details_str = _build_email_details_str(emails_data)
+    if not email_details_str:
+        print("LLM_PROCESSOR (Emails): No email content to process.")
+        return []
+
+    system_prompt = f"""
+You are a highly efficient AI assistant for a user whose role is: '{user_persona}'.
+Their key priorities are: '{user_priorities}'.
+
+You will be given a list of recent unread emails. Your tasks are:
+
+{EMAIL_TRIAGE_TASKS}
+
+
+Analyze the following emails:
+{email_details_str}
+
+Please format your response as a single JSON array, where each object in the array corresponds to an email you analyzed (important or not).
+{EMAIL_RESULT_FIELDS}
 Ensure the entire response is a valid JSON array.
 """
-    processed_emails = []
     response_text_for_debugging = "Gemini call did not occur or failed before response was received."
     try:
         config_obj = types.GenerateContentConfig(
@@ -105,63 +200,20 @@ Ensure the entire response is a valid JSON array.
             config=config_obj # Corrected parameter name to generation_config for client.aio.models
         )
         response_text_for_debugging = response.text
-
-        cleaned_response_text = response.text.strip()
-        if cleaned_response_text.startswith("```json"):
-            cleaned_response_text = cleaned_response_text[7:]
-        if cleaned_response_text.endswith("```"):
-            cleaned_response_text = cleaned_response_text[:-3]
-
-        llm_output = json.loads(cleaned_response_text)
-
-        if isinstance(llm_output, list):
-            llm_output_map = {item.get("email_id"): item for item in llm_output if isinstance(item, dict)}
-            for original_email_data in emails_data:
-                original_id = original_email_data.get('messageId')
-                processed_item = llm_output_map.get(original_id)
-                if processed_item:
-                    processed_emails.append({
-                        "original_email_data": original_email_data,
-                        "is_important": processed_item.get("is_important", False),
-                        "summary": processed_item.get("summary"),
-                        "suggested_actions": processed_item.get("suggested_actions", [])
-                    })
-                else:
-                     processed_emails.append({
-                        "original_email_data": original_email_data,
-                        "is_important": False,
-                        "summary": f"LLM did not provide specific analysis for email ID: {original_id}.",
-                        "suggested_actions": []
-                    })
-        else:
-            print(f"LLM_PROCESSOR (Emails): Gemini response was not a list as expected: {type(llm_output)}")
-            for original_email_data in emails_data:
-                processed_emails.append({"original_email_data": original_email_data, "is_important": False, "summary": "LLM response format error.", "suggested_actions": []})
+        return _map_email_results(emails_data, _parse_llm_json(response.text))
     except json.JSONDecodeError as e:
         print(f"LLM_PROCESSOR (Emails): Failed to decode Gemini JSON response: {e}")
         print(f"LLM_PROCESSOR (Emails): Raw response that failed parsing:\n{response_text_for_debugging}")
-        for original_email_data in emails_data:
-             processed_emails.append({"original_email_data": original_email_data, "is_important": False, "summary": "LLM JSON parsing error.", "suggested_actions": []})
+        return _email_results_with_note(emails_data, "LLM JSON parsing error.")
     except Exception as e:
         print(f"LLM_PROCESSOR (Emails): Error during Gemini API call: {e}")
         print(f"LLM_PROCESSOR (Emails): Raw response that might have caused error (if available):\n{response_text_for_debugging}")
         traceback.print_exc()
-        for original_email_data in emails_data:
-             processed_emails.append({"original_email_data": original_email_data, "is_important": False, "summary": "LLM API call error.", "suggested_actions": []})
-    return processed_emails
+        return _email_results_with_note(emails_data, "LLM API call error.")
 
 # --- Calendar Event Processing ---
-async def process_calendar_events_with_llm(
-    gemini_client: genai.Client,
-    model_name: str,
-    events_data: list,
-    user_config: Dict[str, Any],
-    user_persona: str,
-    user_priorities: str
-):
-    if not events_data:
-        return []
-
+def _build_event_details_str(events_data: list) -> str:
+    """Formats the events section of a calendar prompt."""
     prompt_event_parts = []
     for i, event in enumerate(events_data):
         summary = event.get("summary", "No Title")
@@ -169,14 +221,6 @@ async def process_calendar_events_with_llm(
         start_time = event.get("start", {}).get("dateTime", "No Start Time")
         end_time = event.get("end", {}).get("dateTime", "No End Time")
         description_snippet = event.get("description", "No description")[:150]
-        attendees_list = event.get("attendees", [])
-        attendees_emails = [
-            att.get("email") for att in attendees_list
-            if isinstance(att, dict) and att.get("email") and not att.get("resource", False)
-        ]
-        user_main_email = user_config.get(config_manager.USER_EMAIL_KEY)
-        if user_main_email and user_main_email in attendees_emails:
-            attendees_emails.remove(user_main_email)
 
         prompt_event_parts.append(
             f"Event {i+1} (ID: {event_id}):\n"
@@ -185,11 +229,53 @@ async def process_calendar_events_with_llm(
             f"  End: {end_time}\n"
             f"  Description Snippet: {description_snippet}\n---\n"
         )
+    return "\n".join(prompt_event_parts)
+
+def _event_results_with_note(events_data: list, note: str) -> List[Dict[str, Any]]:
+    """Gives every event the given note and no actions, used when the LLM output is unusable."""
+    return [{"original_event_data": original_event_data, "summary_llm": note, "suggested_actions": [], "analysis_missing": True}
+            for original_event_data in events_data]
+
+def _map_event_results(events_data: list, llm_output: Any) -> List[Dict[str, Any]]:
+    """Joins the LLM's per-event analysis back onto the original event data (by event id)."""
+    if not isinstance(llm_output, list):
+        print(f"LLM_PROCESSOR (Calendar): Gemini response was not a list as expected: {type(llm_output)}")
+        return _event_results_with_note(events_data, "LLM response format error.")
 
-    if not prompt_event_parts:
+    processed_events = []
+    llm_output_map = {item.get("event_id"): item for item in llm_output if isinstance(item, dict)}
+    for original_event_data in events_data:
+        original_id = original_event_data.get('id')
+        processed_item = llm_output_map.get(original_id)
+        if processed_item:
+            processed_events.append({
+                "original_event_data": original_event_data,
+                "summary_llm": processed_item.get("summary_llm"),
+                "suggested_actions": processed_item.get("suggested_actions", [])
+            })
+        else:
+             processed_events.append({
+                "original_event_data": original_event_data,
+                "summary_llm": f"LLM did not provide specific analysis for event ID: {original_id}.",
+                "suggested_actions": [],
+                "analysis_missing": True # Not a real analysis, so it must not be cached
+            })
+    return processed_events
+
+async def process_calendar_events_with_llm(
+    gemini_client: genai.Client,
+    model_name: str,
+    events_data: list,
+    user_persona: str,
+    user_priorities: str
+):
+    if not events_data:
+        return []
+
+    event_details_str = _build_event_details_str(events_data)
+    if not event_details_str:
         print("LLM_PROCESSOR (Calendar): No event content to process for LLM.")
         return []
-    event_details_str = "\n".join(prompt_event_parts)
 
     system_prompt = f"""
 You are a highly efficient AI assistant for a user whose role is: '{user_persona}'.
@@ -197,30 +283,17 @@ Their key priorities are: '{user_priorities}'.
 
 You will be given a list of their upcoming calendar events from Google Calendar.
 Your tasks are:
-1. For EACH event, provide a very brief highlight or summary.
-2. For EACH event, suggest 1-3 brief, actionable next steps using calendar tools.
-   The assistant has tools to:
-     - Delete an event (e.g., "Cancel this meeting")
-     - Update an event's details (e.g., title, time, description, attendees, add Google Meet) -> Suggest as "Update this event's details"
-     - Create a new event
-     - Find free time slots
-
-   Focus on concrete actions related to managing the calendar event itself or follow-ups.
-   Example suggestions: "Delete this event", "Update this event's details", "Schedule a 30-min follow-up".
+{CALENDAR_EVENT_TASKS}
 
 Analyze the following events:
 {event_details_str}
 
 Please format your response as a single JSON array.
-Each object in the array MUST correspond to an event you analyzed and MUST have the following keys:
-- "event_id": (string) The ID of the event (e.g., from "Event 1 (ID: ...)").
-- "summary_llm": (string) Your brief highlight/summary for this event.
-- "suggested_actions": (array of strings) A list of 1-3 suggested actions for this event. If no specific actions are obvious, provide an empty array or a generic suggestion like "Review event details".
+{CALENDAR_RESULT_FIELDS}
 
 Ensure the entire response is a valid JSON array.
 """
 
-    processed_events = []
     response_text_for_debugging = "Gemini call did not occur or failed before response was received."
     try:
         config_obj = types.GenerateContentConfig(
@@ -232,47 +305,96 @@ Ensure the entire response is a valid JSON array.
             config=config_obj # Corrected parameter name to generation_config for client.aio.models
         )
         response_text_for_debugging = response.text
-
-        cleaned_response_text = response.text.strip()
-        if cleaned_response_text.startswith("```json"):
-            cleaned_response_text = cleaned_response_text[7:]
-        if cleaned_response_text.endswith("```"):
-            cleaned_response_text = cleaned_response_text[:-3]
-        llm_output = json.loads(cleaned_response_text)
-
-        if isinstance(llm_output, list):
-            llm_output_map = {item.get("event_id"): item for item in llm_output if isinstance(item, dict)}
-            for original_event_data in events_data:
-                original_id = original_event_data.get('id')
-                processed_item = llm_output_map.get(original_id)
-                if processed_item:
-                    processed_events.append({
-                        "original_event_data": original_event_data,
-                        "summary_llm": processed_item.get("summary_llm"),
-                        "suggested_actions": processed_item.get("suggested_actions", [])
-                    })
-                else:
-                     processed_events.append({
-                        "original_event_data": original_event_data,
-                        "summary_llm": f"LLM did not provide specific analysis for event ID: {original_id}.",
-                        "suggested_actions": []
-                    })
-        else:
-            print(f"LLM_PROCESSOR (Calendar): Gemini response was not a list as expected: {type(llm_output)}")
-            for original_event_data in events_data:
-                processed_events.append({"original_event_data": original_event_data, "summary_llm": "LLM response format error.", "suggested_actions": []})
+        return _map_event_results(events_data, _parse_llm_json(response.text))
     except json.JSONDecodeError as e:
         print(f"LLM_PROCESSOR (Calendar): Failed to decode Gemini JSON response: {e}")
         print(f"LLM_PROCESSOR (Calendar): Raw response that failed parsing:\n{response_text_for_debugging}")
-        for original_event_data in events_data:
-             processed_events.append({"original_event_data": original_event_data, "summary_llm": "LLM JSON parsing error.", "suggested_actions": []})
+        return _event_results_with_note(events_data, "LLM JSON parsing error.")
     except Exception as e:
         print(f"LLM_PROCESSOR (Calendar): Error during Gemini API call: {e}")
         print(f"LLM_PROCESSOR (Calendar): Raw response that might have caused error (if available):\n{response_text_for_debugging}")
         traceback.print_exc()
-        for original_event_data in events_data:
-             processed_events.append({"original_event_data": original_event_data, "summary_llm": "LLM API call error.", "suggested_actions": []})
-    return processed_events
+        return _event_results_with_note(events_data, "LLM API call error.")
+
+# --- Combined Email + Calendar Processing ---
+async def process_proactive_batch(
+    gemini_client: genai.Client,
+    model_name: str,
+    emails_data: list,
+    events_data: list,
+    user_persona: str,
+    user_priorities: str
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Triage emails and annotate calendar events in ONE Gemini request (one round trip, persona sent once).
+    Returns {"emails": [...], "events": [...]} in the same shapes as the single-purpose functions.
+    Falls back to the single-purpose calls if the combined response can't be used.
+    """
+    if not emails_data or not events_data: # Nothing to combine
+        emails_result, events_result = await asyncio.gather(
+            process_emails_with_llm(gemini_client, model_name, emails_data, user_persona, user_priorities),
+            process_calendar_events_with_llm(gemini_client, model_name, events_data, user_persona, user_priorities)
+        )
+        return {"emails": emails_result, "events": events_result}
+
+    system_prompt = f"""
+You are a highly efficient AI assistant for a user whose role is: '{user_persona}'.
+Their key priorities are: '{user_priorities}'.
+
+You will be given two lists: the user's recent unread emails and their upcoming calendar events from Google Calendar.
+
+PART 1 - EMAILS. Your tasks are:
+
+{EMAIL_TRIAGE_TASKS}
+
+Analyze the following emails:
+{_build_email_details_str(emails_data)}
+
+PART 2 - CALENDAR EVENTS. Your tasks are:
+{CALENDAR_EVENT_TASKS}
+
+Analyze the following events:
+{_build_event_details_str(events_data)}
+
+Please format your response as a single JSON object with exactly two keys:
+"emails": a JSON array where each object corresponds to an email you analyzed (important or not).
+{EMAIL_RESULT_FIELDS}
+
+"events": a JSON array where each object corresponds to an event you analyzed.
+{CALENDAR_RESULT_FIELDS}
+
+Ensure the entire response is a valid JSON object.
+"""
+    response_text_for_debugging = "Gemini call did not occur or failed before response was received."
+    try:
+        config_obj = types.GenerateContentConfig(
+            response_mime_type="application/json"
+        )
+        response = await gemini_client.aio.models.generate_content(
+            model=model_name,
+            contents=[system_prompt],
+            config=config_obj
+        )
+        response_text_for_debugging = response.text
+        llm_output = _parse_llm_json(response.text)
+        if isinstance(llm_output, dict) and isinstance(llm_output.get("emails"), list) and isinstance(llm_output.get("events"), list):
+            return {
+                "emails": _map_email_results(emails_data, llm_output["emails"]),
+                "events": _map_event_results(events_data, llm_output["events"]),
+            }
+        print(f"LLM_PROCESSOR (Batch): Combined response did not have 'emails' and 'events' arrays. Falling back to separate calls.")
+    except json.JSONDecodeError as e:
+        print(f"LLM_PROCESSOR (Batch): Failed to decode Gemini JSON response: {e}. Falling back to separate calls.")
+        print(f"LLM_PROCESSOR (Batch): Raw response that failed parsing:\n{response_text_for_debugging}")
+    except Exception as e:
+        print(f"LLM_PROCESSOR (Batch): Error during Gemini API call: {e}. Falling back to separate calls.")
+        traceback.print_exc()
+
+    emails_result, events_result = await asyncio.gather(
+        process_emails_with_llm(gemini_client, model_name, emails_data, user_persona, user_priorities),
+        process_calendar_events_with_llm(gemini_client, model_name, events_data, user_persona, user_priorities)
+    )
+    return {"emails": emails_result, "events": events_result}
 
 
 async def draft_email_reply_with_llm(
@@ -296,28 +418,26 @@ async def draft_email_reply_with_llm(
     original_thread_id = original_email_data.get("threadId", "N/A")
 
     payload = original_email_data.get("payload")
-    if payload and isinstance(payload.get("headers"), list):
-        for header in payload["headers"]:
-            header_name_lower = header.get("name", "").lower()
-            if header_name_lower == "from":
-                original_sender_full_header = header.get("value", "Unknown Sender")
-                if "<" in original_sender_full_header and ">" in original_sender_full_header:
-                    start_index = original_sender_full_header.find("<") + 1
-                    end_index = original_sender_full_header.find(">")
-                    if start_index < end_index:
-                        original_sender_email_only = original_sender_full_header[start_index:end_index].strip()
-                elif "@" in original_sender_full_header:
-                    parts = original_sender_full_header.split()
-                    if len(parts) > 1 and "@" in parts[-1]:
-                        potential_email = parts[-1]
-                        if "@" in potential_email and "." in potential_email:
-                            original_sender_email_only = potential_email.strip()
-                        else:
-                            original_sender_email_only = original_sender_full_header.strip()
-                    elif "@" in original_sender_full_header and "." in original_sender_full_header :
-                        original_sender_email_only = original_sender_full_header.strip()
-            elif header_name_lower == "subject":
-                original_subject = header.get("value", "No Subject")
+    headers = _headers_by_name(payload)
+    if "from" in headers:
+        original_sender_full_header = headers["from"] or "Unknown Sender"
+        if "<" in original_sender_full_header and ">" in original_sender_full_header:
+            start_index = original_sender_full_header.find("<") + 1
+            end_index = original_sender_full_header.find(">")
+            if start_index < end_index:
+                original_sender_email_only = original_sender_full_header[start_index:end_index].strip()
+        elif "@" in original_sender_full_header:
+            parts = original_sender_full_header.split()
+            if len(parts) > 1 and "@" in parts[-1]:
+                potential_email = parts[-1]
+                if "@" in potential_email and "." in potential_email:
+                    original_sender_email_only = potential_email.strip()
+                else:
+                    original_sender_email_only = original_sender_full_header.strip()
+            elif "@" in original_sender_full_header and "." in original_sender_full_header :
+                original_sender_email_only = original_sender_full_header.strip()
+    if "subject" in headers:
+        original_subject = headers["subject"] or "No Subject"
 
     if not original_sender_email_only:
         composio_top_level_sender = original_email_data.get("sender")
@@ -555,10 +675,6 @@ async def _test_llm_processor():
     mock_persona = "Product Manager focused on new feature development and team coordination."
     mock_priorities = "Client feedback, project deadlines, team blockers, and innovative ideas."
 
-    mock_user_config_for_test = {
-        config_manager.USER_EMAIL_KEY: "test_user@example.com",
-    }
-
     mock_emails_data_from_tool = {"data": {"messages": [
         {"messageId": "email123", "snippet": "Q3 budget deadline approaching next Friday.", "messageText": "Team, quick reminder that the Q3 budget deadline is fast approaching next Friday. Please ensure all submissions are in by EOD Thursday.", "payload": {"headers": [{"name": "Subject", "value": "URGENT: Budget Deadline"}, {"name": "From", "value": "Boss <boss@example.com>"}]}},
         {"messageId": "email456", "snippet": "Team lunch tomorrow to celebrate!", "messageText": "Hey everyone, to celebrate the successful project launch, we're having a team lunch tomorrow at The Great Eatery at 1 PM. Hope to see you all there!", "payload": {"headers": [{"name": "Subject", "value": "Team Lunch!"}, {"name": "From", "value": "Friendly Colleague <colleague@example.com>"}]}},
@@ -586,7 +702,6 @@ async def _test_llm_processor():
             gemini_client_for_test,
             MODEL_NAME_TEST,
             mock_calendar_events,
-            mock_user_config_for_test,
             mock_persona,
             mock_priorities
         )
@@ -1,17 +1,63 @@
 # mcp_handler.py
 import asyncio
 import json
+import logging
 import traceback
+try:
+    import orjson # Optional: C-accelerated decoding of large tool payloads
+except ImportError:
+    import json as orjson # Same loads()/JSONDecodeError interface
 import sys
+import time
 from mcp import ClientSession
 from mcp.client.sse import sse_client
 from typing import Dict, List, Optional, Any, Tuple
 
 import user_interface
 import calendar_utils
+import config_manager
+
+# Colour codes bound once, as in assistant.py
+_RED, _GREEN, _YELLOW = user_interface.Fore.RED, user_interface.Fore.GREEN, user_interface.Fore.YELLOW
+_RESET = user_interface.Style.RESET_ALL
 
 COMPOSIO_AUTH_INIT_TOOL = "COMPOSIO_INITIATE_CONNECTION"
 
+# Upper bound on a single tool call, so a stalled MCP server fails that call instead of hanging the caller
+MCP_CALL_TIMEOUT_S = config_manager.get_dev_config_float(config_manager.ENV_MCP_CALL_TIMEOUT_S, 20.0)
+
+# Tools that send or change data. Repeating one after a timeout could double-send or double-book, and the server
+# may still finish it, so they get a much longer bound and a timeout is reported as "outcome unknown"
+MCP_WRITE_TOOLS = frozenset({
+    "GMAIL_REPLY_TO_THREAD",
+    "GOOGLECALENDAR_CREATE_EVENT",
+    "GOOGLECALENDAR_UPDATE_EVENT",
+    "GOOGLECALENDAR_DELETE_EVENT",
+})
+MCP_WRITE_CALL_TIMEOUT_S = config_manager.get_dev_config_float(config_manager.ENV_MCP_WRITE_CALL_TIMEOUT_S, 120.0)
+
+# Connection/tool-call chatter is DEBUG-level; errors and auth prompts are still printed
+log = logging.getLogger("mcp_handler")
+
+# Recently decoded tool texts, keyed by id() and holding the string itself so the id can't be reused
+TOOL_TEXT_CACHE_SIZE = 4
+_decoded_tool_texts: Dict[int, Tuple[str, Any]] = {}
+
+def loads_tool_text(text: str) -> Any:
+    """
+    Decodes the JSON text of a tool result item. ensure_auth_and_call_tool already decodes the first
+    item to look for auth errors, so callers parsing that same string get the cached result back.
+    Treat the returned data as read-only. Raises orjson.JSONDecodeError on invalid JSON.
+    """
+    cached = _decoded_tool_texts.get(id(text))
+    if cached and cached[0] is text:
+        return cached[1]
+    data = orjson.loads(text)
+    if len(_decoded_tool_texts) >= TOOL_TEXT_CACHE_SIZE:
+        _decoded_tool_texts.pop(next(iter(_decoded_tool_texts))) # Drop the oldest entry
+    _decoded_tool_texts[id(text)] = (text, data)
+    return data
+
 async def call_composio_initiate_connection(session: ClientSession, app_name: str, user_id_for_logging: str):
     # (This function remains the same as the one from my previous response that correctly parsed the redirect_url)
     # ... (ensure it has the robust redirect_url parsing)
@@ -73,15 +119,15 @@ class McpSessionManager:
 
     async def __aenter__(self):
         # (Same as previous correct version with sys.exc_info())
-        print(f"MCP_SM ({self.app_name}): Connecting to {self.full_mcp_url}")
+        log.debug("MCP_SM (%s): Connecting to %s", self.app_name, self.full_mcp_url)
         try:
             self._sse_client_cm = sse_client(self.full_mcp_url)
             self._transport_streams = await self._sse_client_cm.__aenter__()
             self.session = ClientSession(self._transport_streams[0], self._transport_streams[1])
             await self.session.__aenter__()
-            print(f"MCP_SM ({self.app_name}): Initializing session...")
+            log.debug("MCP_SM (%s): Initializing session...", self.app_name)
             await self.session.initialize()
-            print(f"MCP_SM ({self.app_name}): Session initialized.")
+            log.debug("MCP_SM (%s): Session initialized.", self.app_name)
             await self._list_and_cache_tools() # List tools on connect
             return self
         except Exception as e:
@@ -96,39 +142,41 @@ class McpSessionManager:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         # (Same as previous correct version)
-        print(f"MCP_SM ({self.app_name}): Closing session...")
+        log.debug("MCP_SM (%s): Closing session...", self.app_name)
         if self.session: await self.session.__aexit__(exc_type, exc_val, exc_tb)
         if self._sse_client_cm: await self._sse_client_cm.__aexit__(exc_type, exc_val, exc_tb)
-        print(f"MCP_SM ({self.app_name}): Session closed.")
+        log.debug("MCP_SM (%s): Session closed.", self.app_name)
 
     async def _list_and_cache_tools(self): # Added this method
         if not self.session: return
-        print(f"MCP_SM ({self.app_name}): Listing tools...")
+        log.debug("MCP_SM (%s): Listing tools...", self.app_name)
         try:
             tools_response = await self.session.list_tools()
             self.tools = {tool.name: tool for tool in tools_response.tools}
-            print(f"MCP_SM ({self.app_name}): Found {len(self.tools)} tools.")
+            log.debug("MCP_SM (%s): Found %d tools.", self.app_name, len(self.tools))
         except Exception as e:
             print(f"MCP_SM ({self.app_name}): Error listing tools: {e}")
             self.tools = {}
 
-    async def ensure_auth_and_call_tool(self, tool_name: str, params: dict):
+    async def ensure_auth_and_call_tool(self, tool_name: str, params: dict, timeout_s: Optional[float] = None):
+        if timeout_s is None:
+            timeout_s = MCP_WRITE_CALL_TIMEOUT_S if tool_name in MCP_WRITE_TOOLS else MCP_CALL_TIMEOUT_S
         if not self.session:
             print(f"MCP_SM ({self.app_name}): No active session for tool '{tool_name}'. Cannot proceed.")
             return {"error": f"No active MCP session for {self.app_name}.", "needs_reconnect": True}
 
-        print(f"MCP_SM ({self.app_name}): Attempting to call tool '{tool_name}' with params {params}...")
-        print(f"MCP_SM ({self.app_name}): FINAL PARAMS BEING SENT TO SDK's call_tool for '{tool_name}': {json.dumps(params, indent=2)}") # ADD THIS LINE
+        if log.isEnabledFor(logging.DEBUG): # Avoids the json.dumps on every call otherwise
+            log.debug(f"MCP_SM ({self.app_name}): Calling tool '{tool_name}' with params: {json.dumps(params, indent=2)}")
         try:
-            tool_result = await self.session.call_tool(tool_name, params)
+            tool_result = await asyncio.wait_for(self.session.call_tool(tool_name, params), timeout=timeout_s)
 
             if hasattr(tool_result, 'content') and tool_result.content:
                             first_content_item_text = getattr(tool_result.content[0], 'text', None) # Ensure default is None
                             data = None # Initialize data
                             if first_content_item_text:
                                 try:
-                                    data = json.loads(first_content_item_text)
-                                except json.JSONDecodeError:
+                                    data = loads_tool_text(first_content_item_text)
+                                except orjson.JSONDecodeError:
                                     print(f"MCP_SM ({self.app_name}): Content text is not valid JSON: {first_content_item_text[:100]}...")
                                     pass # data remains None or previous value
 
@@ -162,6 +210,12 @@ class McpSessionManager:
                         # If no specific auth/Composio error detected in content, assume it's a valid tool result
                             return tool_result
 
+        except asyncio.TimeoutError:
+            if tool_name in MCP_WRITE_TOOLS:
+                print(f"{_YELLOW}MCP_SM ({self.app_name}): No response from '{tool_name}' within {timeout_s:g}s. Outcome unknown: it may still have been applied.{_RESET}")
+                return {"error": f"No response within {timeout_s:g}s, outcome unknown. Check before retrying.", "timeout": True, "outcome_unknown": True}
+            print(f"MCP_SM ({self.app_name}): Tool '{tool_name}' timed out after {timeout_s:g}s.")
+            return {"error": f"Timed out after {timeout_s:g}s", "timeout": True}
         except Exception as e:
             print(f"MCP_SM ({self.app_name}): Exception calling tool '{tool_name}': {e}")
             traceback.print_exc()
@@ -192,7 +246,7 @@ class McpSessionManager:
         tool_name = "GOOGLECALENDAR_FIND_FREE_SLOTS"
         if tool_name not in self.tools:
             msg = f"Tool '{tool_name}' not available in cached tools. Check Composio allowed_tools."
-            print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): {msg}{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}MCP_SM ({self.app_name}): {msg}{_RESET}")
             return {"error": msg, "successful": False}
 
         params = {
@@ -230,7 +284,7 @@ class McpSessionManager:
             if text_content:
                 try:
                     composio_response = json.loads(text_content)
-                    print(f"DEBUG_MCP_HANDLER (FindFreeSlots): Composio_response received.")
+                    log.debug("DEBUG_MCP_HANDLER (FindFreeSlots): Composio_response received.")
 
                     if composio_response.get("successful") is True:
                         response_data = composio_response.get("data", {}).get("response_data", {})
@@ -241,7 +295,7 @@ class McpSessionManager:
 
                         if not query_start_dt or not query_end_dt:
                             msg = "Invalid time_min or time_max provided for free slot calculation."
-                            print(f"{user_interface.Fore.RED}{msg}{user_interface.Style.RESET_ALL}")
+                            print(f"{_RED}{msg}{_RESET}")
                             return {"successful": False, "error": msg}
 
                         free_slots = calendar_utils.calculate_free_slots(
@@ -252,30 +306,30 @@ class McpSessionManager:
                             workday_start_hour=user_work_start_hour,
                             workday_end_hour=user_work_end_hour                            # workday_start_hour and workday_end_hour use defaults from calendar_utils
                         )
-                        print(f"{user_interface.Fore.GREEN}Successfully found {len(free_slots)} free slot(s).{user_interface.Style.RESET_ALL}")
+                        print(f"{_GREEN}Successfully found {len(free_slots)} free slot(s).{_RESET}")
                         return {"successful": True, "free_slots": free_slots}
 
                     elif composio_response.get("successful") is False and composio_response.get("error") is not None:
                         error_msg = str(composio_response.get("error"))
-                        print(f"{user_interface.Fore.RED}Composio tool '{tool_name}' reported failure: {error_msg}{user_interface.Style.RESET_ALL}")
+                        print(f"{_RED}Composio tool '{tool_name}' reported failure: {error_msg}{_RESET}")
                         return {"successful": False, "error": error_msg, "composio_reported_error": True}
                     else:
                         msg = f"Composio response for {tool_name} did not indicate clear success or provide a specific error."
-                        print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): {msg} Response: {json.dumps(composio_response, indent=2)}{user_interface.Style.RESET_ALL}")
+                        print(f"{_YELLOW}MCP_SM ({self.app_name}): {msg} Response: {json.dumps(composio_response, indent=2)}{_RESET}")
                         return {"successful": False, "error": msg}
 
                 except json.JSONDecodeError:
                     msg = f"Could not parse {tool_name} JSON response."
-                    print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): {msg} Raw: {text_content[:200]}...{user_interface.Style.RESET_ALL}")
+                    print(f"{_RED}MCP_SM ({self.app_name}): {msg} Raw: {text_content[:200]}...{_RESET}")
                     return {"successful": False, "error": msg}
             else:
                 msg = f"No text content in {tool_name} response item."
-                print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): {msg}{user_interface.Style.RESET_ALL}")
+                print(f"{_YELLOW}MCP_SM ({self.app_name}): {msg}{_RESET}")
                 return {"successful": False, "error": msg}
 
         # 3. Fallback
         msg = f"Unexpected result structure from {tool_name} after tool call."
-        print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): {msg} Raw: {find_slots_outcome}{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}MCP_SM ({self.app_name}): {msg} Raw: {find_slots_outcome}{_RESET}")
         return {"successful": False, "error": msg}
 
 
@@ -300,7 +354,7 @@ class McpSessionManager:
         # Check if this tool is actually available from the list fetched from Composio
         if tool_name not in self.tools:
 
-            print(f"{user_interface.Fore.YELLOW}MCP_SM (gmail): Tool '{tool_name}' not found. Attempting to create a draft instead.{user_interface.Style.RESET_ALL}")
+            print(f"{_YELLOW}MCP_SM (gmail): Tool '{tool_name}' not found. Attempting to create a draft instead.{_RESET}")
             # We need subject for create_draft. We can try to get it or just use a generic one.
             # For simplicity, let's say draft creation for reply also needs the original subject.
             # This part would need the original subject if we go the draft route.
@@ -332,7 +386,8 @@ class McpSessionManager:
             return {
                 "error": reply_result_from_mcp.get("error", f"Unknown error calling {tool_name}"),
                 "successful": False,
-                "needs_user_action": reply_result_from_mcp.get("needs_user_action", False)
+                "needs_user_action": reply_result_from_mcp.get("needs_user_action", False),
+                "outcome_unknown": reply_result_from_mcp.get("outcome_unknown", False)
             }
 
         if reply_result_from_mcp and hasattr(reply_result_from_mcp, 'content') and reply_result_from_mcp.content:
@@ -343,11 +398,11 @@ class McpSessionManager:
                     if composio_response.get("successful"):
                         # The "data" from "reply to thread" might not have a specific ID like a draft,
                         # but it indicates success.
-                        print(f"{user_interface.Fore.GREEN}Successfully replied to Gmail thread (Thread ID: {thread_id}).{user_interface.Style.RESET_ALL}")
+                        print(f"{_GREEN}Successfully replied to Gmail thread (Thread ID: {thread_id}).{_RESET}")
                         return {"successful": True, "message": f"Successfully replied to thread ID: {thread_id}."}
                     else:
                         error_msg = composio_response.get("error", f"Failed to reply to thread, Composio tool reported not successful.")
-                        print(f"{user_interface.Fore.RED}{error_msg}{user_interface.Style.RESET_ALL}")
+                        print(f"{_RED}{error_msg}{_RESET}")
                         return {"successful": False, "error": error_msg}
                 except json.JSONDecodeError:
                     return {"successful": False, "error": f"Could not parse {tool_name} response from Composio."}
@@ -366,7 +421,7 @@ class McpSessionManager:
 
         if tool_name not in self.tools:
             msg = f"Tool '{tool_name}' not available. Ensure it's in Composio allowed_tools."
-            print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): {msg}{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}MCP_SM ({self.app_name}): {msg}{_RESET}")
             return {"error": msg, "successful": False}
 
         params = {
@@ -398,33 +453,34 @@ class McpSessionManager:
             if text_content:
                 try:
                     composio_response = json.loads(text_content)
-                    print(f"DEBUG_MCP_HANDLER (MarkThreadAsRead): Parsed composio_response: {json.dumps(composio_response, indent=2)}")
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug(f"DEBUG_MCP_HANDLER (MarkThreadAsRead): Parsed composio_response: {json.dumps(composio_response, indent=2)}")
 
                     if composio_response.get("successful") is True:
                         # Google's threads.modify API returns the modified thread resource.
                         modified_thread_data = composio_response.get("data", {}).get("response_data", {})
-                        print(f"{user_interface.Fore.GREEN}Successfully marked thread ID '{thread_id}' as read.{user_interface.Style.RESET_ALL}")
+                        print(f"{_GREEN}Successfully marked thread ID '{thread_id}' as read.{_RESET}")
                         return {"successful": True, "message": f"Thread {thread_id} marked as read.", "modified_thread_data": modified_thread_data}
 
                     elif composio_response.get("successful") is False and composio_response.get("error") is not None:
                         error_msg = str(composio_response.get("error"))
-                        print(f"{user_interface.Fore.RED}Composio tool '{tool_name}' (thread {thread_id}) reported failure: {error_msg}{user_interface.Style.RESET_ALL}")
+                        print(f"{_RED}Composio tool '{tool_name}' (thread {thread_id}) reported failure: {error_msg}{_RESET}")
                         return {"successful": False, "error": error_msg, "composio_reported_error": True}
                     else:
                         msg = f"Composio response for {tool_name} (thread {thread_id}) unclear."
-                        print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): {msg} Response: {json.dumps(composio_response, indent=2)}{user_interface.Style.RESET_ALL}")
+                        print(f"{_YELLOW}MCP_SM ({self.app_name}): {msg} Response: {json.dumps(composio_response, indent=2)}{_RESET}")
                         return {"successful": False, "error": msg}
                 except json.JSONDecodeError:
                     msg = f"Could not parse {tool_name} JSON response for thread {thread_id}."
-                    print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): {msg} Raw: {text_content[:200]}...{user_interface.Style.RESET_ALL}")
+                    print(f"{_RED}MCP_SM ({self.app_name}): {msg} Raw: {text_content[:200]}...{_RESET}")
                     return {"successful": False, "error": msg}
             else:
                 msg = f"No text content in {tool_name} response item for thread {thread_id}."
-                print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): {msg}{user_interface.Style.RESET_ALL}")
+                print(f"{_YELLOW}MCP_SM ({self.app_name}): {msg}{_RESET}")
                 return {"successful": False, "error": msg}
 
         msg = f"Unhandled result structure from {tool_name} for thread {thread_id}."
-        print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): {msg} Raw: {outcome}{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}MCP_SM ({self.app_name}): {msg} Raw: {outcome}{_RESET}")
         return {"successful": False, "error": msg}
 
     async def delete_calendar_event(self, event_id: str, calendar_id: str = "primary") -> Dict[str, Any]:
@@ -438,7 +494,7 @@ class McpSessionManager:
         tool_name = "GOOGLECALENDAR_DELETE_EVENT" # Confirm this slug from your allowed_tools
 
         if tool_name not in self.tools:
-            print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): Tool '{tool_name}' not available in cached tools.{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}MCP_SM ({self.app_name}): Tool '{tool_name}' not available in cached tools.{_RESET}")
             return {"error": f"Tool '{tool_name}' not available.", "successful": False}
 
         params = {
@@ -456,7 +512,8 @@ class McpSessionManager:
             return {
                 "error": delete_result_from_mcp.get("error", f"Unknown error calling {tool_name}"),
                 "successful": False,
-                "needs_user_action": delete_result_from_mcp.get("needs_user_action", False)
+                "needs_user_action": delete_result_from_mcp.get("needs_user_action", False),
+                "outcome_unknown": delete_result_from_mcp.get("outcome_unknown", False)
             }
 
         # Google Calendar API delete operation usually returns an empty response (204 No Content) on success.
@@ -468,18 +525,18 @@ class McpSessionManager:
                 try:
                     composio_response = json.loads(text_content)
                     if composio_response.get("successful"):
-                        print(f"{user_interface.Fore.GREEN}Successfully deleted Calendar event (ID: {event_id}).{user_interface.Style.RESET_ALL}")
+                        print(f"{_GREEN}Successfully deleted Calendar event (ID: {event_id}).{_RESET}")
                         return {"successful": True, "message": f"Event ID: {event_id} deleted."}
                     else:
                         error_msg = composio_response.get("error", f"Failed to delete event, Composio tool reported not successful.")
-                        print(f"{user_interface.Fore.RED}{error_msg}{user_interface.Style.RESET_ALL}")
+                        print(f"{_RED}{error_msg}{_RESET}")
                         return {"successful": False, "error": error_msg}
                 except json.JSONDecodeError:
                     # Sometimes a successful delete might not return JSON body from the tool,
                     # or Composio might wrap a 204 differently.
                     # If no JSON, but no prior error, we might infer success.
                     # However, it's safer to expect Composio's wrapper.
-                    print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): Could not parse {tool_name} response from Composio, but no explicit error from tool call. Raw text: '{text_content[:100]}...'{user_interface.Style.RESET_ALL}")
+                    print(f"{_YELLOW}MCP_SM ({self.app_name}): Could not parse {tool_name} response from Composio, but no explicit error from tool call. Raw text: '{text_content[:100]}...'{_RESET}")
                     # Let's assume for now an unparseable response without an MCP error is a problem.
                     return {"successful": False, "error": f"Could not parse {tool_name} response."}
         elif delete_result_from_mcp and not hasattr(delete_result_from_mcp, 'isError'):
@@ -489,7 +546,7 @@ class McpSessionManager:
             # The ensure_auth_and_call_tool should ideally return a dict with "successful":True if composio does.
             # Let's assume if we reach here and it's not an error dict from ensure_auth_and_call_tool, it might have worked.
             # This logic relies on ensure_auth_and_call_tool correctly parsing Composio's success envelope.
-             print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): {tool_name} call returned no content, assuming success if no prior error.{user_interface.Style.RESET_ALL}")
+             print(f"{_YELLOW}MCP_SM ({self.app_name}): {tool_name} call returned no content, assuming success if no prior error.{_RESET}")
              return {"successful": True, "message": f"Event ID: {event_id} likely deleted (no content in response)."}
 
 
@@ -506,7 +563,7 @@ class McpSessionManager:
 
         tool_name = "GOOGLECALENDAR_UPDATE_EVENT"
         if tool_name not in self.tools:
-            print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): Tool '{tool_name}' not available.{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}MCP_SM ({self.app_name}): Tool '{tool_name}' not available.{_RESET}")
             return {"error": f"Tool '{tool_name}' not available.", "successful": False}
 
         if not updates: # If no updates provided, nothing to do
@@ -525,7 +582,7 @@ class McpSessionManager:
             if key in valid_update_keys:
                 actual_params_to_send[key] = value
             else:
-                print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): Ignoring unknown update key '{key}' for tool '{tool_name}'.{user_interface.Style.RESET_ALL}")
+                print(f"{_YELLOW}MCP_SM ({self.app_name}): Ignoring unknown update key '{key}' for tool '{tool_name}'.{_RESET}")
 
         # Remove event_id and calendar_id from 'updates' dict for cleaner logging of just changes
         updates_for_logging = {k:v for k,v in actual_params_to_send.items() if k not in ['event_id', 'calendar_id']}
@@ -534,26 +591,26 @@ class McpSessionManager:
             # Parameter sanity checks based on CSV
         if "start_datetime" in actual_params_to_send:
                 if not isinstance(actual_params_to_send["start_datetime"], str) or "T" not in actual_params_to_send["start_datetime"]:
-                     print(f"{user_interface.Fore.RED}Error: start_datetime for update must be YYYY-MM-DDTHH:MM:SS, got {actual_params_to_send['start_datetime']}{user_interface.Style.RESET_ALL}")
+                     print(f"{_RED}Error: start_datetime for update must be YYYY-MM-DDTHH:MM:SS, got {actual_params_to_send['start_datetime']}{_RESET}")
                      return {"error": "start_datetime must be YYYY-MM-DDTHH:MM:SS", "successful": False}
         if "event_duration_minutes" in actual_params_to_send:
             try:
                 minutes = int(actual_params_to_send["event_duration_minutes"])
                 if not (0 <= minutes <= 59): # Schema said 0-59
-                    print(f"{user_interface.Fore.RED}Error: event_duration_minutes must be 0-59, got {minutes}{user_interface.Style.RESET_ALL}")
+                    print(f"{_RED}Error: event_duration_minutes must be 0-59, got {minutes}{_RESET}")
                     return {"error": "event_duration_minutes must be 0-59", "successful": False}
             except ValueError:
-                print(f"{user_interface.Fore.RED}Error: event_duration_minutes must be an integer, got {actual_params_to_send['event_duration_minutes']}{user_interface.Style.RESET_ALL}")
+                print(f"{_RED}Error: event_duration_minutes must be an integer, got {actual_params_to_send['event_duration_minutes']}{_RESET}")
                 return {"error": "event_duration_minutes must be an integer", "successful": False}
 
         if "event_duration_hour" in actual_params_to_send:
             try:
                 hours = int(actual_params_to_send["event_duration_hour"])
                 if not (0 <= hours <= 23): # Schema implied 0-24, but 24h usually means next day start. 0-23 is safer for duration part.
-                    print(f"{user_interface.Fore.RED}Error: event_duration_hour must be 0-23, got {hours}{user_interface.Style.RESET_ALL}")
+                    print(f"{_RED}Error: event_duration_hour must be 0-23, got {hours}{_RESET}")
                     return {"error": "event_duration_hour must be 0-23", "successful": False}
             except ValueError:
-                print(f"{user_interface.Fore.RED}Error: event_duration_hour must be an integer, got {actual_params_to_send['event_duration_hour']}{user_interface.Style.RESET_ALL}")
+                print(f"{_RED}Error: event_duration_hour must be an integer, got {actual_params_to_send['event_duration_hour']}{_RESET}")
                 return {"error": "event_duration_hour must be an integer", "successful": False}
            # Add more checks as needed
 
@@ -572,7 +629,7 @@ class McpSessionManager:
 
         # 1. Handle direct error dicts from ensure_auth_and_call_tool
         if isinstance(tool_call_outcome, dict) and tool_call_outcome.get("error"):
-            print(f"DEBUG_MCP_HANDLER: Returning error directly from ensure_auth_and_call_tool: {tool_call_outcome.get('error')}")
+            log.debug("DEBUG_MCP_HANDLER: Returning error directly from ensure_auth_and_call_tool: %s", tool_call_outcome.get('error'))
             return tool_call_outcome # This already has "successful": False (implicitly or explicitly) if it's an error
 
         # 2. Process ToolCallResult if it's not an error dict
@@ -581,35 +638,36 @@ class McpSessionManager:
             if text_content:
                 try:
                     composio_response = json.loads(text_content)
-                    print(f"DEBUG_MCP_HANDLER: Parsed composio_response: {json.dumps(composio_response, indent=2)}")
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug(f"DEBUG_MCP_HANDLER: Parsed composio_response: {json.dumps(composio_response, indent=2)}")
 
                     if composio_response.get("successful") is True:
-                        print(f"DEBUG_MCP_HANDLER: Composio reported success.")
+                        log.debug("DEBUG_MCP_HANDLER: Composio reported success.")
                         response_data = composio_response.get("data", {}).get("response_data", {}) # For update/fetch
                         if not response_data and tool_name == "GOOGLECALENDAR_DELETE_EVENT": # Delete might have empty response_data
                             response_data = {"message": "Delete operation reported successful by Composio."}
 
-                        print(f"{user_interface.Fore.GREEN}Successfully executed {tool_name} for event (ID: {event_id}).{user_interface.Style.RESET_ALL}")
+                        print(f"{_GREEN}Successfully executed {tool_name} for event (ID: {event_id}).{_RESET}")
                         return {"successful": True, "message": f"Tool {tool_name} successful for event ID: {event_id}.", "response_data": response_data}
 
                     elif composio_response.get("successful") is False and composio_response.get("error") is not None:
                         error_msg = str(composio_response.get("error"))
-                        print(f"{user_interface.Fore.RED}Composio tool '{tool_name}' reported failure: {error_msg}{user_interface.Style.RESET_ALL}")
+                        print(f"{_RED}Composio tool '{tool_name}' reported failure: {error_msg}{_RESET}")
                         return {"successful": False, "error": error_msg, "composio_reported_error": True}
 
                     else: # "successful" key not True, or missing, or False without an "error" field
-                        print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): Composio response for {tool_name} unclear: {json.dumps(composio_response, indent=2)}{user_interface.Style.RESET_ALL}")
+                        print(f"{_YELLOW}MCP_SM ({self.app_name}): Composio response for {tool_name} unclear: {json.dumps(composio_response, indent=2)}{_RESET}")
                         return {"successful": False, "error": f"Composio response for {tool_name} did not indicate clear success or provide a specific error."}
 
                 except json.JSONDecodeError:
-                    print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): JSONDecodeError parsing {tool_name} response: {text_content[:200]}...{user_interface.Style.RESET_ALL}")
+                    print(f"{_RED}MCP_SM ({self.app_name}): JSONDecodeError parsing {tool_name} response: {text_content[:200]}...{_RESET}")
                     return {"successful": False, "error": f"Could not parse {tool_name} JSON response."}
             else: # text_content is None or empty
-                print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): No text_content in {tool_name} response item.{user_interface.Style.RESET_ALL}")
+                print(f"{_YELLOW}MCP_SM ({self.app_name}): No text_content in {tool_name} response item.{_RESET}")
                 return {"successful": False, "error": f"No text content in {tool_name} response item."}
 
         # 3. Fallback: If tool_call_outcome is not an error dict and not a ToolCallResult with parseable content
-        print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): Unhandled result structure from {tool_name}. Raw: {tool_call_outcome}{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}MCP_SM ({self.app_name}): Unhandled result structure from {tool_name}. Raw: {tool_call_outcome}{_RESET}")
         return {"successful": False, "error": f"Unexpected result structure from {tool_name} after tool call."}
 
     async def create_calendar_event(self, event_details: Dict[str, Any], calendar_id: str = "primary") -> Dict[str, Any]:
@@ -624,7 +682,7 @@ class McpSessionManager:
 
         tool_name = "GOOGLECALENDAR_CREATE_EVENT"
         if tool_name not in self.tools:
-            print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): Tool '{tool_name}' not available.{user_interface.Style.RESET_ALL}")
+            print(f"{_RED}MCP_SM ({self.app_name}): Tool '{tool_name}' not available.{_RESET}")
             return {"error": f"Tool '{tool_name}' not available.", "successful": False}
 
         # Prepare params from event_details, ensuring required ones are present
@@ -637,7 +695,7 @@ class McpSessionManager:
                 if req_key == "summary" and not event_details.get(req_key):
                     params[req_key] = "Untitled Event" # Default if LLM/user missed it
                 else:
-                    print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): Missing required key '{req_key}' for {tool_name}.{user_interface.Style.RESET_ALL}")
+                    print(f"{_RED}MCP_SM ({self.app_name}): Missing required key '{req_key}' for {tool_name}.{_RESET}")
                     return {"error": f"Missing required key '{req_key}' for event creation.", "successful": False}
 
         params.update(event_details) # Add all details from the validated dict
@@ -660,30 +718,104 @@ class McpSessionManager:
             if text_content:
                 try:
                     composio_response = json.loads(text_content)
-                    print(f"DEBUG_MCP_HANDLER (CreateEvent): Parsed composio_response: {json.dumps(composio_response, indent=2)}")
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug(f"DEBUG_MCP_HANDLER (CreateEvent): Parsed composio_response: {json.dumps(composio_response, indent=2)}")
 
                     if composio_response.get("successful") is True:
                         created_event_data = composio_response.get("data", {}).get("response_data", {})
                         event_id = created_event_data.get("id", "N/A")
-                        print(f"{user_interface.Fore.GREEN}Successfully created Calendar event (ID: {event_id}).{user_interface.Style.RESET_ALL}")
+                        print(f"{_GREEN}Successfully created Calendar event (ID: {event_id}).{_RESET}")
                         return {"successful": True, "message": f"Event created (ID: {event_id}).", "created_event_data": created_event_data}
                     elif composio_response.get("successful") is False and composio_response.get("error") is not None:
                         # ... (error handling as in update_calendar_event) ...
                         error_msg = str(composio_response.get("error"))
-                        print(f"{user_interface.Fore.RED}Composio tool '{tool_name}' reported failure: {error_msg}{user_interface.Style.RESET_ALL}")
+                        print(f"{_RED}Composio tool '{tool_name}' reported failure: {error_msg}{_RESET}")
                         return {"successful": False, "error": error_msg, "composio_reported_error": True}
                     else:
                         # ... (unclear success handling as in update_calendar_event) ...
-                        print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): Composio response for {tool_name} unclear: {json.dumps(composio_response, indent=2)}{user_interface.Style.RESET_ALL}")
+                        print(f"{_YELLOW}MCP_SM ({self.app_name}): Composio response for {tool_name} unclear: {json.dumps(composio_response, indent=2)}{_RESET}")
                         return {"successful": False, "error": f"Composio response for {tool_name} did not indicate clear success or provide a specific error."}
                 except json.JSONDecodeError:
                     # ... (JSON decode error handling) ...
-                    print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): JSONDecodeError parsing {tool_name} response: {text_content[:200]}...{user_interface.Style.RESET_ALL}")
+                    print(f"{_RED}MCP_SM ({self.app_name}): JSONDecodeError parsing {tool_name} response: {text_content[:200]}...{_RESET}")
                     return {"successful": False, "error": f"Could not parse {tool_name} JSON response."}
             else: # text_content is None or empty
                 # ... (no text_content error handling) ...
-                print(f"{user_interface.Fore.YELLOW}MCP_SM ({self.app_name}): No text_content in {tool_name} response item.{user_interface.Style.RESET_ALL}")
+                print(f"{_YELLOW}MCP_SM ({self.app_name}): No text_content in {tool_name} response item.{_RESET}")
                 return {"successful": False, "error": f"No text content in {tool_name} response item."}
 
-        print(f"{user_interface.Fore.RED}MCP_SM ({self.app_name}): Unhandled result structure from {tool_name}. Raw: {creation_result_from_mcp}{user_interface.Style.RESET_ALL}")
+        print(f"{_RED}MCP_SM ({self.app_name}): Unhandled result structure from {tool_name}. Raw: {creation_result_from_mcp}{_RESET}")
         return {"successful": False, "error": f"Unexpected result structure from {tool_name} after tool call."}
+
+
+# A pooled session idle for longer than this is reconnected, since the server may have dropped the SSE stream
+MCP_SESSION_IDLE_TTL_S = 300
+
+class McpSessionPool:
+    """
+    Keeps one live McpSessionManager per (mcp_base_url, user_id, app_name) for the life of the process.
+    app_name is part of the key because the manager uses it for Composio auth checks and re-auth.
+    Connecting costs the SSE handshake, initialize and list_tools round trips, so sessions are
+    opened on first use and reused by later calls. Call close_all() once on shutdown.
+    """
+    def __init__(self):
+        self._managers: Dict[Tuple[str, str, str], McpSessionManager] = {}
+        self._holders: Dict[Tuple[str, str, str], Tuple[asyncio.Task, asyncio.Event]] = {}
+        self._locks: Dict[Tuple[str, str, str], asyncio.Lock] = {}
+        self._last_used: Dict[Tuple[str, str, str], float] = {}
+
+    @staticmethod
+    async def _hold(manager: McpSessionManager, ready: asyncio.Future, release: asyncio.Event):
+        """Owns a manager's async context so it is entered and exited in the same task (required by the SSE transport)."""
+        try:
+            async with manager:
+                ready.set_result(manager)
+                await release.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"{_RED}MCP_POOL: Session '{manager.app_name}' closed with error: {e}{_RESET}")
+
+    async def get(self, mcp_base_url: str, user_id: str, app_name: str) -> McpSessionManager:
+        """Returns a live session for this server/user/app, connecting on first use. Raises on connection errors."""
+        pool_key = (mcp_base_url, user_id, app_name)
+        lock = self._locks.setdefault(pool_key, asyncio.Lock())
+        async with lock: # Concurrent callers for the same server share one connection attempt
+            now = time.monotonic()
+            manager = self._managers.get(pool_key)
+            if manager:
+                holder_task, _ = self._holders[pool_key]
+                if manager.session and not holder_task.done() and now - self._last_used[pool_key] < MCP_SESSION_IDLE_TTL_S:
+                    self._last_used[pool_key] = now
+                    return manager
+                await self._close(pool_key) # Dead or stale: reconnect below
+
+            manager = McpSessionManager(mcp_base_url, user_id, app_name)
+            ready = asyncio.get_running_loop().create_future()
+            release = asyncio.Event()
+            holder_task = asyncio.create_task(self._hold(manager, ready, release))
+            await ready # Re-raises connection errors, same as entering the context manager directly
+            self._managers[pool_key] = manager
+            self._holders[pool_key] = (holder_task, release)
+            self._last_used[pool_key] = now
+            return manager
+
+    async def _close(self, pool_key: Tuple[str, str, str]):
+        """Closes and forgets one pooled session."""
+        self._managers.pop(pool_key, None)
+        self._last_used.pop(pool_key, None)
+        holder_task, release = self._holders.pop(pool_key)
+        release.set()
+        await asyncio.gather(holder_task, return_exceptions=True)
+
+    async def close_all(self):
+        """Closes every pooled session."""
+        holders = list(self._holders.values())
+        self._managers.clear()
+        self._holders.clear()
+        self._last_used.clear()
+        for _, release in holders:
+            release.set()
+        if holders:
+            await asyncio.gather(*(holder_task for holder_task, _ in holders), return_exceptions=True)
@@ -33,13 +33,17 @@ def get_yes_no_input(prompt_message: str, default_yes: bool = True) -> bool:
         response = input(prompt).strip().lower()
         if not response:
             return default_yes
-        if response in ['y', 'yes']:
+        if response in {'y', 'yes'}:
             return True
-        if response in ['n', 'no']:
+        if response in {'n', 'no'}:
             return False
         print(f"{Fore.RED}Invalid input. Please enter 'y' or 'n'.{Style.RESET_ALL}")
 
 # --- Display Functions ---
+def emit(lines: List[str]):
+    """Writes several lines to stdout in one write, rather than one write per print() on a line-buffered terminal."""
+    sys.stdout.write("\n".join(lines) + "\n")
+
 def print_header(text: str):
     """Prints a styled header."""
     print(f"\n{Style.BRIGHT}{Fore.MAGENTA}--- {text} ---{Style.RESET_ALL}")
@@ -69,16 +73,19 @@ def display_email_summary(index: int, email_data: Dict[str, Any]):
     sender = original_email.get("sender", "Unknown Sender")
     subject = original_email.get("subject", "No Subject")
 
-    print(f"{Style.BRIGHT}{index}. From: {Fore.YELLOW}{sender}{Style.RESET_ALL}")
-    print(f"   Subject: {Fore.YELLOW}{subject}{Style.RESET_ALL}")
-    print(f"   {Fore.WHITE}Summary: {email_data.get('summary', 'N/A')}{Style.RESET_ALL}")
+    lines = [
+        f"{Style.BRIGHT}{index}. From: {Fore.YELLOW}{sender}{Style.RESET_ALL}",
+        f"   Subject: {Fore.YELLOW}{subject}{Style.RESET_ALL}",
+        f"   {Fore.WHITE}Summary: {email_data.get('summary', 'N/A')}{Style.RESET_ALL}"
+    ]
 
     actions = email_data.get('suggested_actions', [])
     if actions:
-        print(f"   {Fore.GREEN}Suggested Actions:{Style.RESET_ALL}")
+        lines.append(f"   {Fore.GREEN}Suggested Actions:{Style.RESET_ALL}")
         for i, action_text in enumerate(actions):
-            print(f"     {Style.BRIGHT}{Fore.GREEN}({chr(97 + i)}){Style.RESET_ALL} {action_text}") # a, b, c...
-    print("-" * 10)
+            lines.append(f"     {Style.BRIGHT}{Fore.GREEN}({chr(97 + i)}){Style.RESET_ALL} {action_text}") # a, b, c...
+    lines.append("-" * 10)
+    emit(lines)
 
 def format_datetime_for_display(iso_datetime_str: Optional[str]) -> str:
     if not iso_datetime_str:
@@ -110,17 +117,20 @@ def display_calendar_event_summary(index: int, event_data: Dict[str, Any]):
     formatted_start_time = format_datetime_for_display(start_iso)
     # formatted_end_time = format_datetime_for_display(end_iso) # If you want to show end time
 
-    print(f"{Style.BRIGHT}{index}. Event: {Fore.YELLOW}{title}{Style.RESET_ALL}")
-    print(f"   Starts: {Fore.YELLOW}{formatted_start_time}{Style.RESET_ALL}")
-    # print(f"   Ends:   {Fore.YELLOW}{formatted_end_time}{Style.RESET_ALL}")
-    print(f"   {Fore.WHITE}LLM Note: {event_data.get('summary_llm', 'N/A')}{Style.RESET_ALL}")
+    lines = [
+        f"{Style.BRIGHT}{index}. Event: {Fore.YELLOW}{title}{Style.RESET_ALL}",
+        f"   Starts: {Fore.YELLOW}{formatted_start_time}{Style.RESET_ALL}",
+        # f"   Ends:   {Fore.YELLOW}{formatted_end_time}{Style.RESET_ALL}",
+        f"   {Fore.WHITE}LLM Note: {event_data.get('summary_llm', 'N/A')}{Style.RESET_ALL}"
+    ]
 
     actions = event_data.get('suggested_actions', [])
     if actions:
-        print(f"   {Fore.GREEN}Suggested Actions:{Style.RESET_ALL}")
+        lines.append(f"   {Fore.GREEN}Suggested Actions:{Style.RESET_ALL}")
         for i, action_text in enumerate(actions):
-            print(f"     {Style.BRIGHT}{Fore.GREEN}({chr(97 + i)}){Style.RESET_ALL} {action_text}")
-    print("-" * 10)
+            lines.append(f"     {Style.BRIGHT}{Fore.GREEN}({chr(97 + i)}){Style.RESET_ALL} {action_text}")
+    lines.append("-" * 10)
+    emit(lines)
 
 # user_interface.py
 def display_processed_data_and_get_action(
@@ -234,11 +244,13 @@ def display_free_slots(free_slots_list: List[Dict[str, str]], for_date_str: str)
         print(f"{Fore.YELLOW}No free slots found for the specified duration and date.{Style.RESET_ALL}")
         return
 
+    lines = []
     for i, slot in enumerate(free_slots_list):
         start_display = format_datetime_for_display(slot.get("start"))
         end_display = format_datetime_for_display(slot.get("end"))
-        print(f"  {Style.BRIGHT}{i+1}.{Style.RESET_ALL} {Fore.GREEN}{start_display}{Style.RESET_ALL} to {Fore.GREEN}{end_display}{Style.RESET_ALL}")
-    print("-" * 10)
+        lines.append(f"  {Style.BRIGHT}{i+1}.{Style.RESET_ALL} {Fore.GREEN}{start_display}{Style.RESET_ALL} to {Fore.GREEN}{end_display}{Style.RESET_ALL}")
+    lines.append("-" * 10)
+    emit(lines)
 
 def get_event_update_choices(original_event_summary: str, original_event_details: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     print_header(f"Update Event: {original_event_summary[:50]}...")